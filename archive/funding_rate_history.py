@@ -1,41 +1,42 @@
+import heapq
 import requests
 from datetime import datetime, timezone
 
 
 def get_top5_latest_group(symbols=None, limit_per_symbol=100):
     url = "https://fapi.binance.com/fapi/v1/fundingRate"
-    all_rates = []
+    latest_time = 0
+    latest_group = []
 
     if symbols is None:
         symbols = [None]
 
-    for symbol in symbols:
-        params = {'limit': limit_per_symbol}
-        if symbol:
-            params['symbol'] = symbol
-
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            print(f"Ошибка для {symbol}: {response.status_code}")
-            continue
-
-        data = response.json()
-        for item in data:
-            # добавляем модуль только для сортировки
-            item['absFundingRate'] = abs(float(item['fundingRate']))
-            all_rates.append(item)
-
-    if not all_rates:
+    # одна сессия на все символы - переиспользуем TCP соединение
+    with requests.Session() as session:
+        for symbol in symbols:
+            params = {'limit': limit_per_symbol}
+            if symbol:
+                params['symbol'] = symbol
+
+            response = session.get(url, params=params)
+            if response.status_code != 200:
+                print(f"Ошибка для {symbol}: {response.status_code}")
+                continue
+
+            # за один проход оставляем только группу с самым поздним fundingTime
+            for item in response.json():
+                funding_time = item['fundingTime']
+                if funding_time > latest_time:
+                    latest_time = funding_time
+                    latest_group = [item]
+                elif funding_time == latest_time:
+                    latest_group.append(item)
+
+    if not latest_group:
         return []
 
-    # находим ближайший по времени fundingTime
-    latest_time = max(item['fundingTime'] for item in all_rates)
-
-    # фильтруем только эту группу
-    latest_group = [item for item in all_rates if item['fundingTime'] == latest_time]
-
-    # сортируем по модулю fundingRate по убыванию
-    latest_group_sorted = sorted(latest_group, key=lambda x: x['absFundingRate'], reverse=True)
+    # топ-5 по модулю fundingRate без полной сортировки
+    top5 = heapq.nlargest(5, latest_group, key=lambda x: abs(float(x['fundingRate'])))
 
     # преобразуем дату в читаемый формат
     human_time = datetime.fromtimestamp(latest_time / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
@@ -44,7 +45,7 @@ def get_top5_latest_group(symbols=None, limit_per_symbol=100):
     print(f"Funding Time (latest): {human_time} UTC\n")
     print(f"{'№':<3} {'Symbol':<10} {'FundingRate':<15} {'MarkPrice':<15} {'Time UTC'}")
     print("-" * 60)
-    for i, r in enumerate(latest_group_sorted[:5], 1):
+    for i, r in enumerate(top5, 1):
         print(f"{i:<3} {r['symbol']:<10} {r['fundingRate']:<15} {r['markPrice']:<15} {human_time}")
 
 
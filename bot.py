@@ -716,9 +716,24 @@ class FundingBot:
         except Exception as e:
             logger.error(f"Error in check_time_alerts: {e}")
     
+    async def _post_init(self, application: Application):
+        """Запуск предзагрузки отчетов (/top и мониторинг) по расписанию funding."""
+        self.aggregator.start_prefetch(limits=(5, 10))
+    
+    async def _post_shutdown(self, application: Application):
+        """Закрытие HTTP клиентов бирж при остановке бота."""
+        await self.aggregator.aclose()
+        logger.info("Exchange clients closed")
+    
     def run(self):
         """Запуск бота."""
-        self.app = Application.builder().token(self.token).build()
+        self.app = (
+            Application.builder()
+            .token(self.token)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         
         # Регистрация обработчиков команд
         self.app.add_handler(CommandHandler("start", self.start))
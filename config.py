@@ -22,7 +22,6 @@ class Config:
     ALERT_COOLDOWN = 3600  # Cooldown между алертами для одного токена (1 час)
     
     # Настройки агрегатора
-    MAX_WORKERS = 10  # Количество потоков для параллельных запросов
     TOP_CONTRACTS_LIMIT = 20  # Количество топ контрактов для анализа
     
     # Тайм-ауты
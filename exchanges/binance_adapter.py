@@ -1,9 +1,8 @@
 """Асинхронный адаптер для биржи Binance."""
-from datetime import datetime, timezone
 from typing import List, Optional
 import logging
 
-from exchanges.base import ExchangeAdapter
+from exchanges.base import ExchangeAdapter, ms_to_utc
 from models import FundingRate, ContractInfo
 
 logger = logging.getLogger(__name__)
@@ -12,6 +11,7 @@ logger = logging.getLogger(__name__)
 class BinanceAdapter(ExchangeAdapter):
     """Асинхронный адаптер для работы с API Binance Futures."""
     
+    SUPPORTS_BULK_FUNDING_RATES = True
     BASE_URL = "https://fapi.binance.com"
     
     def __init__(self):
@@ -64,10 +64,7 @@ class BinanceAdapter(ExchangeAdapter):
             next_funding_time_ms = int(data.get('nextFundingTime', 0))
             mark_price = float(data.get('markPrice', 0))
             
-            next_funding_time = datetime.fromtimestamp(
-                next_funding_time_ms / 1000,
-                tz=timezone.utc
-            )
+            next_funding_time = ms_to_utc(next_funding_time_ms)
             
             return FundingRate(
                 exchange=self.name,
@@ -101,10 +98,7 @@ class BinanceAdapter(ExchangeAdapter):
                     if next_funding_time_ms == 0:
                         continue
                     
-                    next_funding_time = datetime.fromtimestamp(
-                        next_funding_time_ms / 1000,
-                        tz=timezone.utc
-                    )
+                    next_funding_time = ms_to_utc(next_funding_time_ms)
                     
                     funding_rates.append(FundingRate(
                         exchange=self.name,
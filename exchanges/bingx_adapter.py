@@ -2,7 +2,7 @@
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional
 import logging
-from exchanges.base import ExchangeAdapter
+from exchanges.base import ExchangeAdapter, ms_to_utc
 from models import FundingRate, ContractInfo
 
 logger = logging.getLogger(__name__)
@@ -80,10 +80,7 @@ class BingxAdapter(ExchangeAdapter):
                 if next_hour < hour:
                     next_funding_time += timedelta(days=1)
             else:
-                next_funding_time = datetime.fromtimestamp(
-                    next_funding_time_ms / 1000,
-                    tz=timezone.utc
-                )
+                next_funding_time = ms_to_utc(next_funding_time_ms)
             
             return FundingRate(
                 exchange=self.name,
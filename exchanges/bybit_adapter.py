@@ -1,9 +1,8 @@
 """Асинхронный адаптер для биржи Bybit."""
-from datetime import datetime, timezone
 from typing import List, Optional
 import logging
 
-from exchanges.base import ExchangeAdapter
+from exchanges.base import ExchangeAdapter, ms_to_utc
 from models import FundingRate, ContractInfo
 
 
@@ -13,6 +12,7 @@ logger = logging.getLogger(__name__)
 class BybitAdapter(ExchangeAdapter):
     """Асинхронный адаптер для работы с API Bybit."""
     
+    SUPPORTS_BULK_FUNDING_RATES = True
     BASE_URL = "https://api.bybit.com"
     
     def __init__(self):
@@ -78,10 +78,7 @@ class BybitAdapter(ExchangeAdapter):
             next_funding_time_str = ticker.get('nextFundingTime', '0')
             price = float(ticker.get('lastPrice', 0))
             
-            next_funding_time = datetime.fromtimestamp(
-                int(next_funding_time_str) / 1000,
-                tz=timezone.utc
-            )
+            next_funding_time = ms_to_utc(int(next_funding_time_str))
             
             return FundingRate(
                 exchange=self.name,
@@ -124,10 +121,7 @@ class BybitAdapter(ExchangeAdapter):
                     if next_funding_time_str == '0':
                         continue
                     
-                    next_funding_time = datetime.fromtimestamp(
-                        int(next_funding_time_str) / 1000,
-                        tz=timezone.utc
-                    )
+                    next_funding_time = ms_to_utc(int(next_funding_time_str))
                     
                     funding_rates.append(FundingRate(
                         exchange=self.name,
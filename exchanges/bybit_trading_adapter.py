@@ -2,10 +2,10 @@
 import hmac
 import hashlib
 import time
-from datetime import datetime, timezone
 from typing import List, Optional, Dict
 import logging
 
+from exchanges.base import ms_to_utc
 from exchanges.base_trading import (
     TradingExchangeAdapter,
     OrderSide,
@@ -109,10 +109,7 @@ class BybitTradingAdapter(TradingExchangeAdapter):
             next_funding_time_str = ticker.get('nextFundingTime', '0')
             price = float(ticker.get('lastPrice', 0))
             
-            next_funding_time = datetime.fromtimestamp(
-                int(next_funding_time_str) / 1000,
-                tz=timezone.utc
-            )
+            next_funding_time = ms_to_utc(int(next_funding_time_str))
             
             return FundingRate(
                 exchange=self.name,
@@ -1,7 +1,10 @@
 """Асинхронный адаптер для биржи MEXC."""
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional
+import asyncio
 import logging
+import re
+import time
 
 from exchanges.base import ExchangeAdapter
 from models import FundingRate, ContractInfo
@@ -9,11 +12,27 @@ from models import FundingRate, ContractInfo
 
 logger = logging.getLogger(__name__)
 
+# USDT perpetual контракты MEXC: BTC_USDT -> BTC
+_MEXC_USDT_RE = re.compile(r'^([A-Z0-9]+)_USDT$')
+
+
+def _mexc_next_funding_time(now: datetime) -> datetime:
+    """Ближайшая граница funding MEXC (каждые 8 часов: 00:00, 08:00, 16:00 UTC)."""
+    hour = now.hour
+    next_hour = ((hour // 8) + 1) * 8 % 24
+    next_funding_time = now.replace(hour=next_hour, minute=0, second=0, microsecond=0)
+    
+    if next_hour < hour:
+        next_funding_time += timedelta(days=1)
+    
+    return next_funding_time
+
 
 class MexcAdapter(ExchangeAdapter):
     """Асинхронный адаптер для работы с API MEXC Futures."""
     
     BASE_URL = "https://contract.mexc.com"
+    CONTRACTS_TTL = 300.0  # Время жизни кэша списка контрактов в секундах
     
     def __init__(self):
         super().__init__("MEXC")
@@ -21,45 +40,70 @@ class MexcAdapter(ExchangeAdapter):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
             'Accept': 'application/json'
         }
+        # Список контрактов (contract/detail - тяжелый ответ) меняется редко
+        self._contracts_cache: List[ContractInfo] = []
+        self._contracts_updated_at = 0.0
+        self._contracts_lock = asyncio.Lock()
     
     async def get_top_contracts(self, limit: int = 20) -> List[ContractInfo]:
         """Получить топ контрактов."""
-        try:
-            client = self._get_client()
-            url = f"{self.BASE_URL}/api/v1/contract/detail"
-            response = await client.get(url, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data.get('success'):
-                logger.error(f"MEXC API error: {data}")
-                return []
+        contracts = await self._get_contracts()
+        return contracts[:limit]
+    
+    async def _get_contracts(self) -> List[ContractInfo]:
+        """Получить все USDT контракты, обновляя кэш не чаще раза в CONTRACTS_TTL."""
+        async with self._contracts_lock:
+            if self._contracts_cache and time.monotonic() - self._contracts_updated_at < self.CONTRACTS_TTL:
+                return self._contracts_cache
             
-            contracts = []
-            for contract in data.get('data', []):
-                symbol = contract.get('symbol', '')
-                if '_USDT' in symbol:
-                    base = symbol.replace('_USDT', '')
-                    contracts.append(ContractInfo(
-                        symbol=symbol,
-                        base_currency=base,
-                        quote_currency='USDT'
-                    ))
+            try:
+                client = self._get_client()
+                url = f"{self.BASE_URL}/api/v1/contract/detail"
+                response = await client.get(url, headers=self.headers)
+                response.raise_for_status()
+                data = response.json()
+                
+                if not data.get('success'):
+                    logger.error(f"MEXC API error: {data}")
+                    return self._contracts_cache
+                
+                contracts = []
+                for contract in data.get('data', []):
+                    match = _MEXC_USDT_RE.match(contract.get('symbol', ''))
+                    if match:
+                        contracts.append(ContractInfo(
+                            symbol=match.group(0),
+                            base_currency=match.group(1),
+                            quote_currency='USDT'
+                        ))
+                
+                self._contracts_cache = contracts
+                self._contracts_updated_at = time.monotonic()
+            except Exception as e:
+                # При ошибке отдаем прежний список (пустой, если загрузки еще не было)
+                logger.error(f"Error getting MEXC contracts: {e}")
             
-            return contracts[:limit]
-        except Exception as e:
-            logger.error(f"Error getting MEXC contracts: {e}")
-            return []
+            return self._contracts_cache
     
     async def get_funding_rate(self, symbol: str) -> Optional[FundingRate]:
         """Получить ставку финансирования для конкретного символа."""
+        next_funding_time = _mexc_next_funding_time(datetime.now(timezone.utc))
+        return await self._fetch_funding_rate(symbol, next_funding_time)
+    
+    async def _fetch_funding_rate(self, symbol: str, next_funding_time: datetime) -> Optional[FundingRate]:
+        """
+        Получить ставку для символа с заранее вычисленным временем funding.
+        
+        Время следующего funding одинаково для всех контрактов MEXC,
+        поэтому при массовой загрузке оно вычисляется один раз.
+        """
         try:
             original_symbol = symbol
             # MEXC использует формат BTC_USDT
             if 'USDT' in symbol and '_' not in symbol:
                 symbol = symbol.replace('USDT', '_USDT')
             
-            logger.debug(f"MEXC: Getting rate for {original_symbol} -> {symbol}")
+            logger.debug("MEXC: Getting rate for %s -> %s", original_symbol, symbol)
             
             client = self._get_client()
             
@@ -75,29 +119,18 @@ class MexcAdapter(ExchangeAdapter):
                     funding_rate = float(data.get('fundingRate', 0))
                     price = float(data.get('lastPrice', 0))
                     
-                    logger.debug(f"MEXC: ✅ Got data from ticker for {symbol}: rate={funding_rate}, price={price}")
-                    
-                    # MEXC funding каждые 8 часов (00:00, 08:00, 16:00 UTC)
-                    now = datetime.now(timezone.utc)
-                    hour = now.hour
-                    next_hour = ((hour // 8) + 1) * 8 % 24
-                    next_funding_time = now.replace(hour=next_hour, minute=0, second=0, microsecond=0)
-                    
-                    if next_hour < hour:
-                        next_funding_time += timedelta(days=1)
+                    logger.debug("MEXC: ✅ Got data from ticker for %s: rate=%s, price=%s", symbol, funding_rate, price)
                     
-                    return FundingRate(
-                        exchange=self.name,
+                    return self._make_rate(
                         symbol=symbol,
                         rate=funding_rate,
                         price=price,
-                        next_funding_time=next_funding_time,
-                        quote_currency='USDT'
+                        next_funding_time=next_funding_time
                     )
                 else:
-                    logger.debug(f"MEXC: Ticker returned success={ticker_data.get('success')}, has data={bool(ticker_data.get('data'))}")
+                    logger.debug("MEXC: Ticker returned success=%s, has data=%s", ticker_data.get('success'), bool(ticker_data.get('data')))
             except Exception as ticker_err:
-                logger.debug(f"MEXC ticker failed for {symbol}: {ticker_err}")
+                logger.debug("MEXC ticker failed for %s: %s", symbol, ticker_err)
                 
             # Fallback: пробуем через funding_rate endpoint
             url = f"{self.BASE_URL}/api/v1/contract/funding_rate/{symbol}"
@@ -111,25 +144,14 @@ class MexcAdapter(ExchangeAdapter):
             rate_data = data.get('data', {})
             funding_rate = float(rate_data.get('fundingRate', 0))
             
-            # MEXC funding каждые 8 часов
-            now = datetime.now(timezone.utc)
-            hour = now.hour
-            next_hour = ((hour // 8) + 1) * 8 % 24
-            next_funding_time = now.replace(hour=next_hour, minute=0, second=0, microsecond=0)
-            
-            if next_hour < hour:
-                next_funding_time += timedelta(days=1)
-            
-            return FundingRate(
-                exchange=self.name,
+            return self._make_rate(
                 symbol=symbol,
                 rate=funding_rate,
                 price=0,  # Цена недоступна
-                next_funding_time=next_funding_time,
-                quote_currency='USDT'
+                next_funding_time=next_funding_time
             )
         except Exception as e:
-            logger.debug(f"Error getting MEXC funding rate for {symbol}: {e}")
+            logger.debug("Error getting MEXC funding rate for %s: %s", symbol, e)
             return None
     
     async def get_all_funding_rates(self) -> List[FundingRate]:
@@ -141,9 +163,11 @@ class MexcAdapter(ExchangeAdapter):
                 logger.warning("No contracts found from MEXC")
                 return []
             
+            # Время funding общее для всех контрактов - считаем один раз
+            next_funding_time = _mexc_next_funding_time(datetime.now(timezone.utc))
+            
             # Параллельно получаем funding rates для топ-30 контрактов
-            import asyncio
-            tasks = [self.get_funding_rate(c.symbol) for c in contracts[:30]]
+            tasks = [self._fetch_funding_rate(c.symbol, next_funding_time) for c in contracts[:30]]
             results = await asyncio.gather(*tasks, return_exceptions=True)
             
             funding_rates = [r for r in results if isinstance(r, FundingRate)]
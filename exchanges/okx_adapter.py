@@ -1,20 +1,34 @@
 """Async адаптер для OKX (OKEx)."""
-from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional
+import asyncio
 import logging
-from exchanges.base import ExchangeAdapter
+import re
+import time
+from exchanges.base import ExchangeAdapter, ms_to_utc
 from models import FundingRate, ContractInfo
 
 logger = logging.getLogger(__name__)
 
+# USDT perpetual контракты OKX: BTC-USDT-SWAP -> BTC
+_OKX_USDT_SWAP_RE = re.compile(r'^([A-Z0-9]+)-USDT-SWAP$')
+
 
 class OkxAdapter(ExchangeAdapter):
     """Адаптер для OKX Futures API."""
     
     BASE_URL = "https://www.okx.com"
+    PRICES_TTL = 10.0  # Время жизни кэша цен в секундах
+    # Одновременных запросов к /public/funding-rate: лимит OKX на IP заметно меньше
+    # 30 запросов за раз, а ответы 429 превращаются в None и теряются
+    MAX_PARALLEL_REQUESTS = 10
     
     def __init__(self):
         super().__init__("OKX")
+        # Цены всех SWAP контрактов одним запросом: {instId: price}
+        self._prices_cache: Dict[str, float] = {}
+        self._prices_updated_at = 0.0
+        self._prices_lock = asyncio.Lock()
+        self._requests_sem = asyncio.Semaphore(self.MAX_PARALLEL_REQUESTS)
     
     async def get_top_contracts(self, limit: int = 20) -> List[ContractInfo]:
         """Получить список топ контрактов."""
@@ -32,16 +46,13 @@ class OkxAdapter(ExchangeAdapter):
             
             contracts = []
             for item in data.get('data', [])[:limit]:
-                inst_id = item.get('instId', '')
-                if not inst_id or not inst_id.endswith('-USDT-SWAP'):
+                match = _OKX_USDT_SWAP_RE.match(item.get('instId', ''))
+                if not match:
                     continue
                 
-                base = inst_id.replace('-USDT-SWAP', '')
-                
                 contracts.append(ContractInfo(
-                    exchange=self.name,
-                    symbol=inst_id,
-                    base_currency=base,
+                    symbol=match.group(0),
+                    base_currency=match.group(1),
                     quote_currency='USDT'
                 ))
             
@@ -66,7 +77,7 @@ class OkxAdapter(ExchangeAdapter):
             data = response.json()
             
             if not data or data.get('code') != '0':
-                logger.debug(f"OKX API error for {symbol}: {data}")
+                logger.debug("OKX API error for %s: %s", symbol, data)
                 return None
             
             result_list = data.get('data', [])
@@ -80,45 +91,55 @@ class OkxAdapter(ExchangeAdapter):
             if next_funding_time_ms == 0:
                 return None
             
-            next_funding_time = datetime.fromtimestamp(
-                next_funding_time_ms / 1000,
-                tz=timezone.utc
-            )
+            next_funding_time = ms_to_utc(next_funding_time_ms)
             
             # Получаем цену
             price = await self._get_mark_price(symbol)
             
-            return FundingRate(
-                exchange=self.name,
+            return self._make_rate(
                 symbol=symbol,
                 rate=funding_rate,
                 price=price or 0,
-                next_funding_time=next_funding_time,
-                quote_currency='USDT'
+                next_funding_time=next_funding_time
             )
             
         except Exception as e:
-            logger.debug(f"OKX: No data for {symbol} - {e}")
+            logger.debug("OKX: No data for %s - %s", symbol, e)
             return None
     
+    async def _refresh_prices(self) -> None:
+        """Обновить цены всех SWAP контрактов одним запросом, если кэш устарел."""
+        async with self._prices_lock:
+            if time.monotonic() - self._prices_updated_at < self.PRICES_TTL:
+                return
+            
+            try:
+                client = self._get_client()
+                endpoint = f"{self.BASE_URL}/api/v5/market/tickers"
+                params = {"instType": "SWAP"}
+                
+                response = await client.get(endpoint, params=params, timeout=5.0)
+                data = response.json()
+                
+                if data.get('code') != '0':
+                    logger.debug(f"OKX tickers error: {data}")
+                    return
+                
+                self._prices_cache = {
+                    item['instId']: float(item['last'])
+                    for item in data.get('data', [])
+                    if item.get('last')
+                }
+            except Exception as e:
+                logger.debug(f"OKX: Failed to refresh prices - {e}")
+            finally:
+                # При ошибке тоже ждем TTL, чтобы не повторять запрос на каждый символ
+                self._prices_updated_at = time.monotonic()
+    
     async def _get_mark_price(self, symbol: str) -> Optional[float]:
-        """Получить mark price для символа."""
-        try:
-            client = self._get_client()
-            endpoint = f"{self.BASE_URL}/api/v5/market/mark-price"
-            params = {"instId": symbol, "instType": "SWAP"}
-            
-            response = await client.get(endpoint, params=params, timeout=5.0)
-            data = response.json()
-            
-            if data.get('code') == '0':
-                price_list = data.get('data', [])
-                if price_list:
-                    return float(price_list[0].get('markPx', 0))
-            
-            return None
-        except:
-            return None
+        """Получить цену для символа из общего кэша тикеров."""
+        await self._refresh_prices()
+        return self._prices_cache.get(symbol)
     
     async def get_all_funding_rates(self) -> List[FundingRate]:
         """Получить все ставки финансирования."""
@@ -127,10 +148,16 @@ class OkxAdapter(ExchangeAdapter):
         if not contracts:
             return []
         
-        rates = []
-        for contract in contracts:
-            rate = await self.get_funding_rate(contract.symbol)
-            if rate:
-                rates.append(rate)
+        # Цены загружаем один раз для всех контрактов
+        await self._refresh_prices()
+        
+        # funding-rate требует instId - запрашиваем контракты параллельно,
+        # но не больше MAX_PARALLEL_REQUESTS одновременно
+        async def fetch(symbol: str) -> Optional[FundingRate]:
+            async with self._requests_sem:
+                return await self.get_funding_rate(symbol)
+        
+        tasks = [fetch(contract.symbol) for contract in contracts]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        return rates
+        return [r for r in results if isinstance(r, FundingRate)]
@@ -1,10 +1,10 @@
 """Модели данных для funding rate бота."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FundingRate:
     """Модель для хранения данных о ставке финансирования."""
     
@@ -14,23 +14,24 @@ class FundingRate:
     price: float
     next_funding_time: datetime
     quote_currency: str = "USDT"
+    # Абсолютное значение ставки - вычисляется один раз, используется как ключ сортировки
+    abs_rate: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # frozen=True запрещает обычное присваивание
+        object.__setattr__(self, 'abs_rate', abs(self.rate))
     
     @property
     def rate_percentage(self) -> float:
         """Возвращает ставку в процентах."""
         return self.rate * 100
     
-    @property
-    def abs_rate(self) -> float:
-        """Возвращает абсолютное значение ставки."""
-        return abs(self.rate)
-    
     def __repr__(self) -> str:
         return (f"FundingRate(exchange={self.exchange}, symbol={self.symbol}, "
                 f"rate={self.rate_percentage:.4f}%, price={self.price})")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ContractInfo:
     """Информация о контракте."""
     
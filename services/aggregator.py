@@ -1,35 +1,192 @@
 """Асинхронный сервис для агрегации данных от разных бирж."""
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+import heapq
 import logging
 import asyncio
+import time
+import traceback
 
 from models import FundingRate
 from exchanges.base import ExchangeAdapter
-from services.cache import get_cache
+from services.cache import AsyncCache, get_cache
 
 
 logger = logging.getLogger(__name__)
 
+_LOG_SEPARATOR = '=' * 60
+
+
+def _is_funding_rate(result) -> bool:
+    """Результат запроса ставки - сама ставка (а не None)."""
+    return isinstance(result, FundingRate)
+
 
 class FundingRateAggregator:
     """Асинхронный сервис для агрегации ставок финансирования от разных бирж."""
     
-    def __init__(self, exchanges: List[ExchangeAdapter], cache_ttl: int = 30):
+    # Сколько секунд помнить, что биржа не торгует токеном
+    MISSING_TTL = 300
+    
+    # Известный формат символа для каждой биржи - пробуется первым,
+    # пока для пары (биржа, токен) нет сработавшего варианта
+    PREFERRED_SYMBOL_FORMATS = {
+        'BYBIT': '{base}{quote}',
+        'BINANCE': '{base}{quote}',
+        'BITMART': '{base}{quote}',
+        'BITGET': '{base}{quote}',
+        'MEXC': '{base}_{quote}',
+        'GATE': '{base}_{quote}',
+        'BINGX': '{base}-{quote}',
+        'KUCOIN': '{base}{quote}M',
+        'OKX': '{base}-{quote}-SWAP',
+    }
+    
+    def __init__(
+        self,
+        exchanges: List[ExchangeAdapter],
+        cache_ttl: int = 30,
+        max_parallel: int = 16,
+        parallel_variants: bool = False
+    ):
         """
         Инициализация агрегатора.
         
         Args:
             exchanges: Список адаптеров бирж
             cache_ttl: Время жизни кэша в секундах (по умолчанию 30)
+            max_parallel: Максимум одновременных запросов к биржам (по умолчанию 16)
+            parallel_variants: Запрашивать варианты символа одновременно, если рабочий
+                вариант для биржи еще неизвестен (до 4x запросов, по умолчанию выключено)
         """
         self.exchanges = exchanges
         self.cache = get_cache(ttl=cache_ttl)
         self.cache_ttl = cache_ttl
+        # Кэш отдельных ставок (биржа, токен) с тегом time:<funding>, из которых
+        # собираются отчеты; отдельный, чтобы не засорять /cache_stats.
+        # TTL ставок втрое короче TTL отчета: иначе "свежий" отчет собирался бы
+        # из ставок возрастом до ~TTL, а с окном SWR отдавался бы еще старше
+        self._rate_ttl = max(1, cache_ttl // 3)
+        # Записей по числу (биржа, токен) на каждую сборку - логируем их только на DEBUG
+        self._rate_cache = AsyncCache(default_ttl=self._rate_ttl, log_level=logging.DEBUG)
+        self._time_tag: Optional[str] = None
+        # Ближайшее время funding из последнего отчета - по нему планируется предзагрузка
+        self._next_funding_time: Optional[datetime] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
+        # Ограничение параллельных запросов, чтобы зависшая биржа не копила сокеты
+        self._sem = asyncio.Semaphore(max_parallel)
+        self.parallel_variants = parallel_variants
+        # (биржа, токен) -> время, когда ни один вариант символа не дал данных
+        self._missing: Dict[Tuple[str, str], float] = {}
+        # (биржа, токен) -> вариант символа, который сработал в прошлый раз
+        self._variant_hint: Dict[Tuple[str, str], str] = {}
+    
+    async def __aenter__(self):
+        """Контекстный менеджер для async with."""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Закрытие HTTP клиентов бирж при выходе из контекста."""
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """
+        Закрыть HTTP клиенты всех бирж.
+        
+        Адаптеры держат один долгоживущий клиент (keep-alive, HTTP/2) на все время
+        работы агрегатора, поэтому закрывать их нужно один раз при завершении.
+        """
+        await self.stop_prefetch()
+        results = await asyncio.gather(
+            *(exchange.close() for exchange in self.exchanges),
+            return_exceptions=True
+        )
+        for exchange, result in zip(self.exchanges, results):
+            if isinstance(result, Exception):
+                logger.warning("Error closing %s client: %s", exchange.name, result)
+    
+    def start_prefetch(self, limits: Sequence[int] = (5,), lead_seconds: float = 5.0) -> None:
+        """
+        Запустить фоновую предзагрузку отчетов по расписанию funding.
+        
+        Времена funding известны заранее, поэтому отчеты обновляются за lead_seconds
+        до ближайшего funding и сразу после него (новое окно), а пользователи
+        попадают в прогретый кэш.
+        
+        Args:
+            limits: Значения top_contracts_limit, для которых прогреваются отчеты
+            lead_seconds: За сколько секунд до/после funding обновлять отчеты
+        """
+        if self._prefetch_task is None or self._prefetch_task.done():
+            self._prefetch_task = asyncio.create_task(self._prefetch_loop(tuple(limits), lead_seconds))
+    
+    async def stop_prefetch(self) -> None:
+        """Остановить фоновую предзагрузку."""
+        if self._prefetch_task is None:
+            return
+        self._prefetch_task.cancel()
+        try:
+            await self._prefetch_task
+        except asyncio.CancelledError:
+            pass
+        self._prefetch_task = None
+    
+    async def _prefetch_loop(self, limits: Tuple[int, ...], lead_seconds: float) -> None:
+        """Цикл предзагрузки: обновляет отчеты перед funding и после смены окна."""
+        while True:
+            try:
+                await self._prefetch(limits)
+                funding_time = self._next_funding_time
+                # Отчет не собрался (нет ставок Bybit / будущих funding) или время уже
+                # прошло - ждем TTL, а не повторяем предзагрузку без паузы
+                if funding_time is None or funding_time <= datetime.now(timezone.utc):
+                    await asyncio.sleep(self.cache_ttl)
+                    continue
+                
+                # Перед funding - свежие ставки текущего окна
+                delay = (funding_time - datetime.now(timezone.utc)).total_seconds() - lead_seconds
+                if delay > 0:
+                    logger.info("Next prefetch in %.0fs (funding at %s)", delay, funding_time)
+                    await asyncio.sleep(delay)
+                    await self._prefetch(limits)
+                
+                # После funding - отчет по следующему окну
+                delay = (funding_time - datetime.now(timezone.utc)).total_seconds() + lead_seconds
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Prefetch failed: %s", e)
+                await asyncio.sleep(self.cache_ttl)
+    
+    async def _prefetch(self, limits: Tuple[int, ...]) -> None:
+        """
+        Пересобрать отчеты для всех limits, минуя TTL.
+        
+        Старый отчет заменяется только готовым новым: пока идет сборка, пользователи
+        получают прежний, а при ошибке он остается в кэше. Ставки текущего окна
+        сбрасываются, чтобы перед funding отчет собирался из свежих данных.
+        """
+        if self._time_tag:
+            await self._rate_cache.invalidate_tag(self._time_tag)
+        for limit in limits:
+            grouped = await self._fetch_grouped_by_token(limit)
+            if not grouped:
+                logger.warning("Prefetch for limit %d returned no data, keeping cached report", limit)
+                continue
+            await self.cache.set(
+                f"grouped_by_token:{limit}",
+                grouped,
+                ttl=self.cache_ttl,
+                stale_ttl=self.cache_ttl
+            )
     
-    def get_rates_by_symbol(self, symbol: str) -> List[FundingRate]:
+    async def get_rates_by_symbol(self, symbol: str) -> List[FundingRate]:
         """
-        Получить ставки финансирования для конкретного символа от всех бирж.
+        Получить ставки финансирования для конкретного символа от всех бирж (ASYNC).
         
         Args:
             symbol: Символ контракта (будет нормализован для каждой биржи)
@@ -37,58 +194,47 @@ class FundingRateAggregator:
         Returns:
             Список ставок от всех доступных бирж
         """
-        rates = []
+        # Запрашиваем все биржи ПАРАЛЛЕЛЬНО
+        results = await asyncio.gather(
+            *(exchange.get_funding_rate(symbol) for exchange in self.exchanges),
+            return_exceptions=True
+        )
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Создаем задачи для каждой биржи
-            future_to_exchange = {
-                executor.submit(self._safe_get_funding_rate, exchange, symbol): exchange
-                for exchange in self.exchanges
-            }
-            
-            # Собираем результаты по мере выполнения
-            for future in as_completed(future_to_exchange):
-                exchange = future_to_exchange[future]
-                try:
-                    rate = future.result()
-                    if rate:
-                        rates.append(rate)
-                except Exception as e:
-                    logger.error(f"Error getting rate from {exchange.name}: {e}")
+        rates = []
+        for exchange, result in zip(self.exchanges, results):
+            if isinstance(result, FundingRate):
+                rates.append(result)
+            elif isinstance(result, Exception):
+                logger.debug("Error getting rate from %s for %s: %s", exchange.name, symbol, result)
         
         return rates
     
-    def get_all_rates(self) -> List[FundingRate]:
+    async def get_all_rates(self) -> List[FundingRate]:
         """
-        Получить все ставки финансирования от всех бирж.
+        Получить все ставки финансирования от всех бирж (ASYNC).
         
         Returns:
             Список всех ставок
         """
-        all_rates = []
+        # Запрашиваем все биржи ПАРАЛЛЕЛЬНО
+        results = await asyncio.gather(
+            *(exchange.get_all_funding_rates() for exchange in self.exchanges),
+            return_exceptions=True
+        )
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Создаем задачи для каждой биржи
-            future_to_exchange = {
-                executor.submit(self._safe_get_all_rates, exchange): exchange
-                for exchange in self.exchanges
-            }
-            
-            # Собираем результаты
-            for future in as_completed(future_to_exchange):
-                exchange = future_to_exchange[future]
-                try:
-                    rates = future.result()
-                    all_rates.extend(rates)
-                    logger.info(f"Got {len(rates)} rates from {exchange.name}")
-                except Exception as e:
-                    logger.error(f"Error getting rates from {exchange.name}: {e}")
+        all_rates = []
+        for exchange, result in zip(self.exchanges, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error getting rates from {exchange.name}: {result}")
+                continue
+            all_rates.extend(result)
+            logger.info(f"Got {len(result)} rates from {exchange.name}")
         
         return all_rates
     
-    def get_top_rates(self, limit: int = 20, by_abs: bool = True) -> List[FundingRate]:
+    async def get_top_rates(self, limit: int = 20, by_abs: bool = True) -> List[FundingRate]:
         """
-        Получить топ ставок финансирования.
+        Получить топ ставок финансирования (ASYNC).
         
         Args:
             limit: Количество топ ставок
@@ -97,14 +243,11 @@ class FundingRateAggregator:
         Returns:
             Отсортированный список ставок
         """
-        all_rates = self.get_all_rates()
+        all_rates = await self.get_all_rates()
         
-        if by_abs:
-            all_rates.sort(key=lambda x: x.abs_rate, reverse=True)
-        else:
-            all_rates.sort(key=lambda x: x.rate, reverse=True)
-        
-        return all_rates[:limit]
+        # Нужны только первые limit - частичная выборка вместо полной сортировки
+        key = attrgetter('abs_rate') if by_abs else attrgetter('rate')
+        return heapq.nlargest(limit, all_rates, key=key)
     
     async def get_grouped_by_token(self, top_contracts_limit: int = 5) -> Dict[str, List[FundingRate]]:
         """
@@ -130,11 +273,13 @@ class FundingRateAggregator:
         # Ключ кэша включает параметры запроса
         cache_key = f"grouped_by_token:{top_contracts_limit}"
         
-        # Используем кэш с защитой от одновременных запросов
+        # Используем кэш с защитой от одновременных запросов; в течение еще одного TTL
+        # устаревший отчет отдается сразу, а свежий собирается в фоне
         return await self.cache.get_or_fetch(
             key=cache_key,
             fetch_func=lambda: self._fetch_grouped_by_token(top_contracts_limit),
-            ttl=self.cache_ttl
+            ttl=self.cache_ttl,
+            stale_ttl=self.cache_ttl
         )
     
     async def _fetch_grouped_by_token(self, top_contracts_limit: int = 5) -> Dict[str, List[FundingRate]]:
@@ -152,83 +297,91 @@ class FundingRateAggregator:
             return {}
         
         # Получаем ВСЕ funding rates от Bybit
-        logger.info(f"Getting all funding rates from {source_exchange.name}")
+        logger.info("Getting all funding rates from %s", source_exchange.name)
         all_bybit_rates = await source_exchange.get_all_funding_rates()
         
         if not all_bybit_rates:
             logger.warning("No funding rates found from Bybit")
             return {}
         
-        logger.info(f"Got {len(all_bybit_rates)} funding rates from Bybit")
+        logger.info("Got %d funding rates from Bybit", len(all_bybit_rates))
         
-        # Группируем по времени следующего funding
-        from collections import defaultdict
-        time_groups = defaultdict(list)
+        # Один проход: собираем только группу с ближайшим будущим временем funding
+        now = datetime.now(timezone.utc)
+        nearest_time = None
+        nearest_group: List[FundingRate] = []
+        funding_times = set()
         
         for rate in all_bybit_rates:
             # Округляем время до минуты для группировки
             funding_time_key = rate.next_funding_time.replace(second=0, microsecond=0)
-            time_groups[funding_time_key].append(rate)
-        
-        if not time_groups:
-            logger.warning("No time groups found")
-            return {}
-        
-        # Находим ближайшее время
-        now = datetime.now(timezone.utc)
-        future_times = [t for t in time_groups.keys() if t > now]
-        
-        if not future_times:
+            if funding_time_key <= now:
+                continue
+            funding_times.add(funding_time_key)
+            if nearest_time is None or funding_time_key < nearest_time:
+                nearest_time = funding_time_key
+                nearest_group = [rate]
+            elif funding_time_key == nearest_time:
+                nearest_group.append(rate)
+        
+        if nearest_time is None:
             logger.warning("No future funding times found")
             return {}
         
         # Логируем все доступные времена для диагностики
-        logger.info(f"Available funding times: {sorted(future_times)[:3]}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Available funding times: %s", heapq.nsmallest(3, funding_times))
         
-        nearest_time = min(future_times)
-        logger.info(f"✅ Nearest funding time: {nearest_time} (in {(nearest_time - now).total_seconds() / 60:.1f} minutes)")
+        logger.info("✅ Nearest funding time: %s (in %.1f minutes)", nearest_time, (nearest_time - now).total_seconds() / 60)
         
-        # Берем группу с ближайшим временем
-        nearest_group = time_groups[nearest_time]
-        logger.info(f"Found {len(nearest_group)} contracts with nearest funding time")
+        logger.info("Found %d contracts with nearest funding time", len(nearest_group))
+        
+        # Окно funding сменилось - ставки прошлого окна больше не нужны
+        time_tag = f"time:{nearest_time:%Y-%m-%dT%H:%M}"
+        if self._time_tag and self._time_tag != time_tag:
+            await self._rate_cache.invalidate_tag(self._time_tag)
+        self._time_tag = time_tag
+        self._next_funding_time = nearest_time
         
         # Проверяем что все контракты действительно из одной группы
         for rate in nearest_group:
             time_diff_minutes = (rate.next_funding_time - nearest_time).total_seconds() / 60
             if abs(time_diff_minutes) > 1:  # Больше 1 минуты разницы
-                logger.warning(f"⚠️  Contract {rate.symbol} has different funding time: {rate.next_funding_time} (diff: {time_diff_minutes:.1f} min)")
-        
-        # Сортируем по абсолютному значению funding rate
-        nearest_group.sort(key=lambda x: x.abs_rate, reverse=True)
-        
-        # Берем топ-N контрактов
-        top_contracts = nearest_group[:top_contracts_limit]
-        logger.info(f"Selected top {len(top_contracts)} contracts by funding rate:")
-        for i, contract in enumerate(top_contracts, 1):
-            logger.info(f"  {i}. {contract.symbol}: {contract.rate_percentage:+.4f}% (funding at {contract.next_funding_time})")
+                logger.warning("⚠️  Contract %s has different funding time: %s (diff: %.1f min)", rate.symbol, rate.next_funding_time, time_diff_minutes)
+        
+        # Берем топ-N контрактов по абсолютному значению funding rate
+        top_contracts = heapq.nlargest(top_contracts_limit, nearest_group, key=attrgetter('abs_rate'))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Selected top %d contracts by funding rate:", len(top_contracts))
+            for i, contract in enumerate(top_contracts, 1):
+                logger.info("  %d. %s: %+.4f%% (funding at %s)", i, contract.symbol, contract.rate_percentage, contract.next_funding_time)
+        
+        # Собираем данные по всем токенам от всех бирж (кроме Bybit) ОДНИМ gather
+        other_exchanges = [ex for ex in self.exchanges if ex.name != "BYBIT"]
+        base_tokens = [rate.symbol.removesuffix('PERP').removesuffix('USDT') for rate in top_contracts]
+        pairs = [(base_token, exchange) for base_token in base_tokens for exchange in other_exchanges]
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🚀 Запрашиваю данные по %d токенам от %d бирж: %s",
+                        len(base_tokens), len(other_exchanges), ', '.join(ex.name for ex in other_exchanges))
+        
+        # Биржи с bulk-эндпоинтом при промахе кэша отдают всю таблицу одним запросом
+        all_results = await asyncio.gather(
+            *(self._get_cached_rate(exchange, base_token, time_tag) for base_token, exchange in pairs),
+            return_exceptions=True
+        )
         
-        # Для каждого контракта собираем данные от всех бирж ПАРАЛЛЕЛЬНО
+        # Результаты идут блоками по len(other_exchanges) на каждый токен
         grouped_rates: Dict[str, List[FundingRate]] = {}
+        exchanges_count = len(other_exchanges)
         
-        for bybit_rate in top_contracts:
-            # Извлекаем базовый токен из символа
-            symbol = bybit_rate.symbol
-            base_token = symbol.replace('USDT', '').replace('PERP', '')
-            
-            logger.info(f"\n{'='*60}")
-            logger.info(f"📊 Getting rates for {base_token} (Bybit rate: {bybit_rate.rate_percentage:+.4f}%)")
-            logger.info(f"{'='*60}")
+        for token_index, (bybit_rate, base_token) in enumerate(zip(top_contracts, base_tokens)):
+            logger.info("\n%s\n📊 Rates for %s (Bybit rate: %+.4f%%)\n%s",
+                        _LOG_SEPARATOR, base_token, bybit_rate.rate_percentage, _LOG_SEPARATOR)
             
-            # Собираем данные от всех бирж ПАРАЛЛЕЛЬНО
             rates = [bybit_rate]  # Добавляем ставку от Bybit
-            
-            # Создаем задачи для всех бирж (кроме Bybit)
-            other_exchanges = [ex for ex in self.exchanges if ex.name != "BYBIT"]
-            tasks = [self._get_rate_for_token(exchange, base_token) for exchange in other_exchanges]
-            
-            # Запускаем все задачи параллельно
-            logger.info(f"🚀 Запрашиваю данные от {len(other_exchanges)} бирж: {', '.join([ex.name for ex in other_exchanges])}")
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            offset = token_index * exchanges_count
+            results = all_results[offset:offset + exchanges_count]
             
             # Собираем результаты и логируем детали
             success_count = 0
@@ -241,76 +394,224 @@ class FundingRateAggregator:
                     rates.append(result)
                     success_count += 1
                 elif isinstance(result, Exception):
-                    logger.error(f"  ❌ {exchange_name}: Exception - {type(result).__name__}: {result}")
+                    logger.error("  ❌ %s: Exception - %s: %s", exchange_name, type(result).__name__, result)
                     error_count += 1
                 elif result is None:
                     no_data_count += 1
             
             # Сводка по токену
-            logger.info(f"\n📈 СВОДКА по {base_token}:")
-            logger.info(f"  ✅ Успешно: {success_count + 1} бирж (включая BYBIT)")
-            logger.info(f"  ⚠️  Нет данных: {no_data_count} бирж")
-            logger.info(f"  ❌ Ошибки: {error_count} бирж")
-            logger.info(f"  📊 Всего собрано: {len(rates)} из {len(self.exchanges)} бирж")
+            logger.info(
+                "\n📈 СВОДКА по %s:\n"
+                "  ✅ Успешно: %d бирж (включая BYBIT)\n"
+                "  ⚠️  Нет данных: %d бирж\n"
+                "  ❌ Ошибки: %d бирж\n"
+                "  📊 Всего собрано: %d из %d бирж",
+                base_token, success_count + 1, no_data_count, error_count, len(rates), len(self.exchanges)
+            )
             
             if rates:
                 # Сортируем по абсолютному значению ставки
-                rates.sort(key=lambda x: x.abs_rate, reverse=True)
+                rates.sort(key=attrgetter('abs_rate'), reverse=True)
                 grouped_rates[base_token] = rates
                 
                 # Показываем топ-3 ставки
-                logger.info(f"  🏆 Топ-3 ставки:")
-                for i, rate in enumerate(rates[:3], 1):
-                    logger.info(f"     {i}. {rate.exchange}: {rate.rate_percentage:+.4f}%")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("  🏆 Топ-3 ставки:")
+                    for i, rate in enumerate(rates[:3], 1):
+                        logger.info("     %d. %s: %+.4f%%", i, rate.exchange, rate.rate_percentage)
         
         return grouped_rates
     
-    async def _get_rate_for_token(self, exchange: ExchangeAdapter, base_token: str) -> Optional[FundingRate]:
-        """Вспомогательный метод для получения ставки от одной биржи."""
-        start_time = datetime.now()
+    async def _get_bulk_table(self, exchange: ExchangeAdapter, time_tag: str) -> Optional[Dict[str, FundingRate]]:
+        """
+        Полная таблица ставок биржи, поддерживающей bulk-запрос.
+        
+        Запрашивается только при промахе кэша отдельных ставок и кэшируется рядом
+        с ними: все токены (и отчеты с разными limit) в пределах TTL используют одну
+        загрузку. Неудачная загрузка тоже запоминается на TTL, чтобы промахи по
+        остальным токенам не повторяли ее.
+        
+        Returns:
+            Словарь {символ: ставка} или None, если таблица недоступна и биржу
+            нужно опрашивать по отдельным символам
+        """
+        table = await self._rate_cache.get_or_fetch(
+            key=f"bulk:{exchange.name}:{time_tag}",
+            fetch_func=lambda: self._fetch_bulk_table(exchange),
+            ttl=self._rate_ttl,
+            tags=(time_tag,)
+        )
+        return table or None
+    
+    async def _fetch_bulk_table(self, exchange: ExchangeAdapter) -> Dict[str, FundingRate]:
+        """Загрузить таблицу ставок биржи одним запросом (пустая - если не удалось)."""
+        try:
+            rates = await exchange.get_all_funding_rates()
+        except Exception as e:
+            logger.debug("%s: bulk request failed - %s", exchange.name, e)
+            rates = []
+        
+        if not rates:
+            logger.warning("%s: bulk funding rates unavailable, falling back to per-symbol requests", exchange.name)
+            return {}
+        
+        logger.info("%s: got %d funding rates in one request", exchange.name, len(rates))
+        return {rate.symbol: rate for rate in rates}
+    
+    async def _get_cached_rate(
+        self,
+        exchange: ExchangeAdapter,
+        base_token: str,
+        time_tag: str
+    ) -> Optional[FundingRate]:
+        """
+        Ставка токена на бирже через кэш отдельных ставок.
+        
+        Кэшируются только полученные ставки: None бывает и из-за временной ошибки,
+        а подтвержденное отсутствие данных и так запоминается в _missing.
+        """
+        async def fetch() -> Optional[FundingRate]:
+            # Таблица bulk-биржи нужна только при промахе
+            bulk = None
+            if exchange.SUPPORTS_BULK_FUNDING_RATES:
+                bulk = await self._get_bulk_table(exchange, time_tag)
+            return await self._get_rate_for_token(exchange, base_token, bulk)
+        
+        return await self._rate_cache.get_or_fetch(
+            key=f"rate:{exchange.name}:{base_token}:{time_tag}",
+            fetch_func=fetch,
+            ttl=self._rate_ttl,
+            tags=(time_tag,),
+            cache_if=_is_funding_rate
+        )
+    
+    async def _get_rate_for_token(
+        self,
+        exchange: ExchangeAdapter,
+        base_token: str,
+        bulk: Optional[Dict[str, FundingRate]] = None
+    ) -> Optional[FundingRate]:
+        """
+        Вспомогательный метод для получения ставки от одной биржи.
+        
+        Если передана таблица ставок биржи (bulk), символ ищется в ней без запросов к API.
+        """
+        start_time = time.monotonic()
+        key = (exchange.name, base_token)
+        
+        # Биржа недавно не вернула данных ни по одному варианту - не повторяем запросы
+        missing_since = self._missing.get(key)
+        if missing_since is not None and start_time - missing_since < self.MISSING_TTL:
+            logger.debug("  ⏭️  %s: %s recently missing, skipping", exchange.name, base_token)
+            return None
+        
         try:
             symbol_variants = self._get_symbol_variants(base_token, 'USDT')
             
-            logger.debug(f"🔍 {exchange.name}: trying variants {symbol_variants} for {base_token}")
+            # Сначала пробуем вариант, который сработал в прошлый раз,
+            # а если его нет - известный формат биржи
+            hint = self._variant_hint.get(key)
+            if not hint and exchange.name in self.PREFERRED_SYMBOL_FORMATS:
+                hint = self.PREFERRED_SYMBOL_FORMATS[exchange.name].format(base=base_token, quote='USDT')
+            if hint:
+                symbol_variants = [hint] + [v for v in symbol_variants if v != hint]
             
-            for i, symbol_variant in enumerate(symbol_variants, 1):
-                try:
-                    rate = await exchange.get_funding_rate(symbol_variant)
-                    if rate:
-                        elapsed = (datetime.now() - start_time).total_seconds()
-                        logger.info(f"  ✅ {exchange.name}: {base_token} = {rate.rate_percentage:+.4f}% (symbol: {symbol_variant}, {elapsed:.2f}s)")
-                        return rate
-                    else:
-                        logger.debug(f"  ⚪ {exchange.name}: No data for {symbol_variant} (attempt {i}/{len(symbol_variants)})")
-                except Exception as variant_error:
-                    logger.debug(f"  ⚠️  {exchange.name}: {symbol_variant} failed - {type(variant_error).__name__}: {variant_error}")
-                    continue
+            logger.debug("🔍 %s: trying variants %s for %s", exchange.name, symbol_variants, base_token)
+            
+            if bulk is not None:
+                symbol_variant = next((v for v in symbol_variants if v in bulk), None)
+                rate = bulk[symbol_variant] if symbol_variant else None
+                had_errors = False
+            # Параллельный перебор только пока рабочий вариант неизвестен
+            elif self.parallel_variants and not hint:
+                rate, symbol_variant, had_errors = await self._probe_variants_parallel(exchange, symbol_variants)
+            else:
+                rate, symbol_variant, had_errors = await self._probe_variants_sequential(exchange, symbol_variants)
+            
+            if rate:
+                elapsed = time.monotonic() - start_time
+                logger.info("  ✅ %s: %s = %+.4f%% (symbol: %s, %.2fs)", exchange.name, base_token, rate.rate_percentage, symbol_variant, elapsed)
+                self._variant_hint[key] = symbol_variant
+                self._missing.pop(key, None)
+                return rate
             
-            elapsed = (datetime.now() - start_time).total_seconds()
-            logger.warning(f"  ⚠️  {exchange.name}: No data for {base_token} after trying {len(symbol_variants)} variants ({elapsed:.2f}s)")
+            elapsed = time.monotonic() - start_time
+            logger.warning("  ⚠️  %s: No data for %s after trying %d variants (%.2fs)", exchange.name, base_token, len(symbol_variants), elapsed)
+            # Запоминаем отсутствие только если биржа отвечала без ошибок
+            if not had_errors:
+                self._missing[key] = time.monotonic()
             return None
         except Exception as e:
-            elapsed = (datetime.now() - start_time).total_seconds()
-            logger.error(f"  ❌ {exchange.name}: Error for {base_token}: {type(e).__name__}: {e} ({elapsed:.2f}s)")
-            import traceback
-            logger.debug(f"  Stack trace:\n{traceback.format_exc()}")
+            elapsed = time.monotonic() - start_time
+            logger.error("  ❌ %s: Error for %s: %s: %s (%.2fs)", exchange.name, base_token, type(e).__name__, e, elapsed)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  Stack trace:\n%s", traceback.format_exc())
             return None
     
-    def _safe_get_funding_rate(self, exchange: ExchangeAdapter, symbol: str) -> Optional[FundingRate]:
-        """Безопасное получение ставки с обработкой ошибок."""
-        try:
-            return exchange.get_funding_rate(symbol)
-        except Exception as e:
-            logger.debug(f"Error getting rate from {exchange.name} for {symbol}: {e}")
-            return None
+    async def _probe_variants_sequential(
+        self,
+        exchange: ExchangeAdapter,
+        symbol_variants: Sequence[str]
+    ) -> Tuple[Optional[FundingRate], Optional[str], bool]:
+        """
+        Перебирает варианты символа по очереди до первого успешного.
+        
+        Returns:
+            (ставка, сработавший вариант, были ли ошибки запросов)
+        """
+        had_errors = False
+        for i, symbol_variant in enumerate(symbol_variants, 1):
+            try:
+                async with self._sem:
+                    rate = await exchange.get_funding_rate(symbol_variant)
+                if rate:
+                    return rate, symbol_variant, had_errors
+                logger.debug("  ⚪ %s: No data for %s (attempt %d/%d)", exchange.name, symbol_variant, i, len(symbol_variants))
+            except Exception as variant_error:
+                had_errors = True
+                logger.debug("  ⚠️  %s: %s failed - %s: %s", exchange.name, symbol_variant, type(variant_error).__name__, variant_error)
+        
+        return None, None, had_errors
     
-    def _safe_get_all_rates(self, exchange: ExchangeAdapter) -> List[FundingRate]:
-        """Безопасное получение всех ставок с обработкой ошибок."""
+    async def _probe_variants_parallel(
+        self,
+        exchange: ExchangeAdapter,
+        symbol_variants: Sequence[str]
+    ) -> Tuple[Optional[FundingRate], Optional[str], bool]:
+        """
+        Запрашивает все варианты символа одновременно и берет первый успешный,
+        отменяя остальные запросы.
+        
+        Returns:
+            (ставка, сработавший вариант, были ли ошибки запросов)
+        """
+        async def probe(symbol_variant: str):
+            async with self._sem:
+                return symbol_variant, await exchange.get_funding_rate(symbol_variant)
+        
+        tasks = [asyncio.create_task(probe(v)) for v in symbol_variants]
+        had_errors = False
         try:
-            return exchange.get_all_funding_rates()
-        except Exception as e:
-            logger.error(f"Error getting all rates from {exchange.name}: {e}")
-            return []
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        had_errors = True
+                        logger.debug("  ⚠️  %s: variant failed - %s", exchange.name, task.exception())
+                        continue
+                    symbol_variant, rate = task.result()
+                    if rate:
+                        return rate, symbol_variant, had_errors
+                    logger.debug("  ⚪ %s: No data for %s", exchange.name, symbol_variant)
+            
+            return None, None, had_errors
+        finally:
+            # Отменяем оставшиеся запросы и дожидаемся их завершения
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
     
     async def get_cache_stats(self) -> Dict:
         """Получить статистику кэша."""
@@ -319,6 +620,7 @@ class FundingRateAggregator:
     async def clear_cache(self) -> None:
         """Очистить кэш."""
         await self.cache.clear()
+        await self._rate_cache.clear()
     
     async def invalidate_cache(self, key: str) -> None:
         """Инвалидировать конкретный ключ кэша."""
@@ -346,7 +648,7 @@ class FundingRateAggregator:
                 'long_rate': FundingRate,
                 'short_exchange': str,  # биржа с самой высокой ставкой
                 'short_rate': FundingRate,
-                'all_rates': List[FundingRate]
+                'all_rates': List[FundingRate]  # по возрастанию rate
             }
         """
         logger.info(f"🔍 Searching for hedging opportunities with min spread: {min_spread}%")
@@ -366,7 +668,7 @@ class FundingRateAggregator:
                 continue
             
             # Сортируем по rate (не по abs_rate!)
-            sorted_rates = sorted(rates, key=lambda x: x.rate)
+            sorted_rates = sorted(rates, key=attrgetter('rate'))
             
             # Самая низкая ставка (может быть отрицательной) - здесь выгодно держать LONG
             min_rate = sorted_rates[0]
@@ -376,8 +678,9 @@ class FundingRateAggregator:
             # Вычисляем спред в процентах
             spread = (max_rate.rate - min_rate.rate) * 100
             
-            # Проверяем превышает ли спред минимум
-            if spread >= min_spread:
+            # Проверяем превышает ли спред минимум; при равных ставках (спред 0)
+            # или одной и той же бирже хеджировать нечего - даже для /hedge 0
+            if spread >= min_spread and spread > 0 and min_rate.exchange != max_rate.exchange:
                 opportunity = {
                     'token': token,
                     'spread': spread,
@@ -385,7 +688,7 @@ class FundingRateAggregator:
                     'long_rate': min_rate,
                     'short_exchange': max_rate.exchange,  # Биржа где держим SHORT
                     'short_rate': max_rate,
-                    'all_rates': rates
+                    'all_rates': sorted_rates
                 }
                 opportunities.append(opportunity)
                 
@@ -397,27 +700,30 @@ class FundingRateAggregator:
                 )
         
         # Сортируем по убыванию спреда
-        opportunities.sort(key=lambda x: x['spread'], reverse=True)
+        opportunities.sort(key=itemgetter('spread'), reverse=True)
         
         logger.info(f"✅ Found {len(opportunities)} hedging opportunities")
         
         return opportunities
     
     @staticmethod
-    def _get_symbol_variants(base: str, quote: str) -> List[str]:
+    @lru_cache(maxsize=1024)
+    def _get_symbol_variants(base: str, quote: str) -> Tuple[str, ...]:
         """
         Генерирует варианты символов для разных бирж.
         
+        Результат кэшируется: одни и те же токены запрашиваются у всех бирж.
+        
         Args:
             base: Базовый актив (например, BTC)
             quote: Котируемый актив (например, USDT)
             
         Returns:
-            Список вариантов символов
+            Кортеж вариантов символов
         """
-        return [
+        return (
             f"{base}{quote}",       # BTCUSDT (Binance, Bybit)
             f"{base}_{quote}",      # BTC_USDT (Gate.io, MEXC)
             f"{base}-{quote}",      # BTC-USDT (BingX)
             f"{base}{quote}M",      # BTCUSDTM (KuCoin может использовать)
-        ]
+        )
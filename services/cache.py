@@ -1,9 +1,11 @@
 """Сервис кэширования с TTL и защитой от thundering herd."""
 import asyncio
 import logging
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, Callable, Awaitable
-from dataclasses import dataclass
+import random
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional, Dict, Any, Callable, Awaitable, FrozenSet, Iterable, Set
+from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
@@ -12,14 +14,25 @@ logger = logging.getLogger(__name__)
 class CacheEntry:
     """Запись в кэше."""
     data: Any
-    timestamp: datetime
+    timestamp: float  # time.monotonic() на момент записи
     ttl_seconds: int
+    stale_ttl_seconds: int = 0  # Сколько еще отдавать запись после TTL, пока идет обновление
+    tags: FrozenSet[str] = frozenset()  # Зависимости записи для точечной инвалидации
+    # Абсолютные моменты истечения, чтобы проверка сводилась к одному сравнению
+    expires_at: float = field(init=False, repr=False)
+    stale_until: float = field(init=False, repr=False)
     
-    def is_valid(self) -> bool:
+    def __post_init__(self):
+        self.expires_at = self.timestamp + self.ttl_seconds
+        self.stale_until = self.expires_at + self.stale_ttl_seconds
+    
+    def is_valid(self, now: float) -> bool:
         """Проверяет валидность кэша."""
-        now = datetime.now(timezone.utc)
-        age = (now - self.timestamp).total_seconds()
-        return age < self.ttl_seconds
+        return now < self.expires_at
+    
+    def is_expired(self, now: float) -> bool:
+        """Проверяет, что запись устарела окончательно (TTL и окно stale истекли)."""
+        return now >= self.stale_until
 
 
 class AsyncCache:
@@ -29,29 +42,59 @@ class AsyncCache:
     Особенности:
     - TTL (time to live) для каждой записи
     - Защита от thundering herd: если идет обновление, другие запросы ждут
+    - Случайный разброс TTL, чтобы записи не истекали одновременно
+    - Stale-while-revalidate: устаревшая запись отдается сразу, а обновление идет в фоне
+    - Теги зависимостей: invalidate_tag удаляет только записи с этим тегом
+    - Ограниченный размер: при переполнении вытесняются давно не использованные записи (LRU)
     - Thread-safe для asyncio
     """
     
-    def __init__(self, default_ttl: int = 30):
+    def __init__(
+        self,
+        default_ttl: int = 30,
+        ttl_jitter: float = 0.15,
+        default_stale_ttl: int = 0,
+        max_entries: int = 1024,
+        log_level: int = logging.INFO
+    ):
         """
         Args:
             default_ttl: TTL по умолчанию в секундах
+            ttl_jitter: Доля случайного разброса TTL (0.15 = ±15%, 0 - без разброса)
+            default_stale_ttl: Окно stale-while-revalidate по умолчанию в секундах (0 - выключено)
+            max_entries: Максимум записей (и свободных lock'ов) в кэше
+            log_level: Уровень сообщений о промахах, обновлениях и инвалидации
+                (для мелких и частых записей - logging.DEBUG)
         """
         self.default_ttl = default_ttl
-        self._cache: Dict[str, CacheEntry] = {}
-        self._locks: Dict[str, asyncio.Lock] = {}
-        self._lock = asyncio.Lock()  # Для защиты _locks
+        self.ttl_jitter = ttl_jitter
+        self.default_stale_ttl = default_stale_ttl
+        self.max_entries = max_entries
+        self.log_level = log_level
+        # Порядок записей - от давно использованных к недавно использованным
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # Lock создается синхронно при первом обращении: в одном event loop это атомарно,
+        # поэтому отдельный глобальный lock для _locks не нужен
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        # Тег -> ключи записей с этим тегом
+        self._tag_index: Dict[str, Set[str]] = defaultdict(set)
+        # Фоновые обновления stale-записей (ключ -> задача), не больше одного на ключ
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
         
     async def get_or_fetch(
         self,
         key: str,
         fetch_func: Callable[[], Awaitable[Any]],
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+        cache_if: Optional[Callable[[Any], bool]] = None
     ) -> Any:
         """
         Получает данные из кэша или вызывает fetch_func для получения.
         
         Если кэш валиден - возвращает кэш.
+        Если TTL истек, но запись в окне stale - возвращает ее и обновляет в фоне.
         Если кэш невалиден и идет обновление - ждет завершения обновления.
         Если кэш невалиден и обновление не идет - запускает обновление.
         
@@ -59,54 +102,62 @@ class AsyncCache:
             key: Ключ кэша
             fetch_func: Асинхронная функция для получения данных
             ttl: TTL в секундах (если None - использует default_ttl)
+            stale_ttl: Окно stale-while-revalidate в секундах (если None - default_stale_ttl)
+            tags: Теги зависимостей записи (см. invalidate_tag)
+            cache_if: Если задан - результат сохраняется, только когда cache_if(data) истинно
             
         Returns:
             Данные из кэша или от fetch_func
         """
         ttl = ttl or self.default_ttl
+        if stale_ttl is None:
+            stale_ttl = self.default_stale_ttl
+        tags = frozenset(tags)
         
-        # Проверяем кэш
-        if key in self._cache and self._cache[key].is_valid():
-            age = (datetime.now(timezone.utc) - self._cache[key].timestamp).total_seconds()
-            logger.debug(f"Cache HIT for '{key}' (age: {age:.1f}s)")
-            return self._cache[key].data
+        # Проверяем кэш: один поиск по словарю и одно чтение часов на попадание
+        entry = self._cache.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires_at:
+                logger.debug("Cache HIT for '%s' (age: %.1fs)", key, now - entry.timestamp)
+                self._cache.move_to_end(key)
+                return entry.data
+            if now < entry.stale_until:
+                self._cache.move_to_end(key)
+                logger.log(self.log_level, "Cache SWR for '%s' (age: %.1fs) - refreshing in background", key, now - entry.timestamp)
+                if key not in self._refresh_tasks:
+                    self._refresh_tasks[key] = asyncio.create_task(
+                        self._refresh(key, fetch_func, ttl, stale_ttl, tags, cache_if)
+                    )
+                return entry.data
         
-        # Получаем или создаем lock для этого ключа
-        async with self._lock:
-            if key not in self._locks:
-                self._locks[key] = asyncio.Lock()
-            lock = self._locks[key]
+        lock = self._locks[key]
         
         # Пытаемся получить lock
         if lock.locked():
             # Кто-то уже обновляет, ждем
-            logger.info(f"Cache WAIT for '{key}' - update in progress")
+            logger.log(self.log_level, "Cache WAIT for '%s' - update in progress", key)
             async with lock:
                 # После ожидания проверяем кэш снова
-                if key in self._cache and self._cache[key].is_valid():
-                    logger.debug(f"Cache HIT after wait for '{key}'")
-                    return self._cache[key].data
+                entry = self._cache.get(key)
+                if entry is not None and entry.is_valid(time.monotonic()):
+                    logger.debug("Cache HIT after wait for '%s'", key)
+                    return entry.data
         
         # Получаем lock и обновляем
         async with lock:
             # Double-check: может кто-то уже обновил пока мы ждали
-            if key in self._cache and self._cache[key].is_valid():
-                logger.debug(f"Cache HIT (double-check) for '{key}'")
-                return self._cache[key].data
+            entry = self._cache.get(key)
+            if entry is not None and entry.is_valid(time.monotonic()):
+                logger.debug("Cache HIT (double-check) for '%s'", key)
+                return entry.data
             
             # Обновляем кэш
-            logger.info(f"Cache MISS for '{key}' - fetching data")
+            logger.log(self.log_level, "Cache MISS for '%s' - fetching data", key)
             try:
                 data = await fetch_func()
-                
-                # Сохраняем в кэш
-                self._cache[key] = CacheEntry(
-                    data=data,
-                    timestamp=datetime.now(timezone.utc),
-                    ttl_seconds=ttl
-                )
-                
-                logger.info(f"Cache UPDATED for '{key}' (TTL: {ttl}s)")
+                if cache_if is None or cache_if(data):
+                    self._store(key, data, ttl, stale_ttl, tags)
                 return data
                 
             except Exception as e:
@@ -117,20 +168,127 @@ class AsyncCache:
                     return self._cache[key].data
                 raise
     
+    async def set(
+        self,
+        key: str,
+        data: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        tags: Iterable[str] = ()
+    ) -> None:
+        """
+        Сохраняет заранее полученные данные (например, при предзагрузке).
+        
+        Прежняя запись заменяется только сейчас, поэтому до этого момента
+        она продолжает отдаваться как обычно.
+        """
+        ttl = ttl or self.default_ttl
+        if stale_ttl is None:
+            stale_ttl = self.default_stale_ttl
+        self._store(key, data, ttl, stale_ttl, frozenset(tags))
+    
+    def _store(self, key: str, data: Any, ttl: int, stale_ttl: int, tags: FrozenSet[str] = frozenset()) -> None:
+        """Сохраняет данные в кэш."""
+        # Разброс TTL разносит истечение записей во времени
+        entry_ttl = ttl
+        if self.ttl_jitter:
+            entry_ttl = max(1, round(ttl * random.uniform(1 - self.ttl_jitter, 1 + self.ttl_jitter)))
+        
+        self._unlink_tags(key)
+        self._cache[key] = CacheEntry(
+            data=data,
+            timestamp=time.monotonic(),
+            ttl_seconds=entry_ttl,
+            stale_ttl_seconds=stale_ttl,
+            tags=tags
+        )
+        self._cache.move_to_end(key)
+        for tag in tags:
+            self._tag_index[tag].add(key)
+        
+        logger.log(self.log_level, "Cache UPDATED for '%s' (TTL: %ss)", key, entry_ttl)
+        
+        # Вытесняем давно не использованные записи
+        while len(self._cache) > self.max_entries:
+            evicted_key = next(iter(self._cache))
+            self._unlink_tags(evicted_key)
+            del self._cache[evicted_key]
+            logger.debug("Cache EVICTED '%s'", evicted_key)
+        
+        if len(self._locks) > self.max_entries:
+            self._prune_locks()
+    
+    async def _refresh(
+        self,
+        key: str,
+        fetch_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        tags: FrozenSet[str],
+        cache_if: Optional[Callable[[Any], bool]] = None
+    ) -> None:
+        """Фоновое обновление stale-записи под lock ключа."""
+        try:
+            async with self._locks[key]:
+                entry = self._cache.get(key)
+                if entry is not None and entry.is_valid(time.monotonic()):
+                    return
+                try:
+                    data = await fetch_func()
+                except Exception as e:
+                    # Старая запись остается в кэше до конца окна stale
+                    logger.error(f"Error refreshing data for '{key}': {e}")
+                    return
+                if cache_if is None or cache_if(data):
+                    self._store(key, data, ttl, stale_ttl, tags)
+        finally:
+            self._refresh_tasks.pop(key, None)
+    
+    def _unlink_tags(self, key: str) -> None:
+        """Убирает ключ из индекса тегов его текущей записи."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+    
     async def invalidate(self, key: str) -> None:
         """Инвалидирует кэш для ключа."""
         if key in self._cache:
+            self._unlink_tags(key)
             del self._cache[key]
             logger.debug(f"Cache invalidated for '{key}'")
     
+    async def invalidate_tag(self, tag: str) -> int:
+        """
+        Инвалидирует все записи с тегом.
+        
+        Returns:
+            Количество удаленных записей
+        """
+        keys = self._tag_index.pop(tag, set())
+        for key in keys:
+            self._unlink_tags(key)
+            self._cache.pop(key, None)
+        
+        if keys:
+            logger.log(self.log_level, "Cache invalidated %d entries tagged '%s'", len(keys), tag)
+        
+        return len(keys)
+    
     async def clear(self) -> None:
         """Очищает весь кэш."""
         self._cache.clear()
+        self._tag_index.clear()
         logger.info("Cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику кэша."""
-        now = datetime.now(timezone.utc)
+        now = time.monotonic()
         stats = {
             'total_entries': len(self._cache),
             'valid_entries': 0,
@@ -139,8 +297,8 @@ class AsyncCache:
         }
         
         for key, entry in self._cache.items():
-            is_valid = entry.is_valid()
-            age = (now - entry.timestamp).total_seconds()
+            age = now - entry.timestamp
+            is_valid = entry.is_valid(now)
             
             if is_valid:
                 stats['valid_entries'] += 1
@@ -158,14 +316,33 @@ class AsyncCache:
     
     async def cleanup_expired(self) -> int:
         """Удаляет истекшие записи из кэша."""
-        expired = [key for key, entry in self._cache.items() if not entry.is_valid()]
-        for key in expired:
-            del self._cache[key]
+        now = time.monotonic()
+        total = len(self._cache)
+        # Пересобираем словарь за один проход вместо поштучного удаления
+        self._cache = OrderedDict(
+            (key, entry) for key, entry in self._cache.items() if not entry.is_expired(now)
+        )
+        expired_count = total - len(self._cache)
         
-        if expired:
-            logger.info(f"Cleaned up {len(expired)} expired cache entries")
+        if expired_count:
+            self._tag_index = defaultdict(set, {
+                tag: live_keys for tag, keys in self._tag_index.items()
+                if (live_keys := keys & self._cache.keys())
+            })
+        
+        self._prune_locks()
         
-        return len(expired)
+        if expired_count:
+            logger.info(f"Cleaned up {expired_count} expired cache entries")
+        
+        return expired_count
+    
+    def _prune_locks(self) -> None:
+        """Оставляет lock'и только для живых ключей и тех, что сейчас заняты."""
+        self._locks = defaultdict(asyncio.Lock, {
+            key: lock for key, lock in self._locks.items()
+            if key in self._cache or lock.locked()
+        })
 
 
 # Глобальный экземпляр кэша
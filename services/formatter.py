@@ -1,8 +1,76 @@
 """Сервис для форматирования сообщений."""
-from typing import List, Dict
+from bisect import bisect_right
+from typing import List, Dict, Tuple
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from operator import itemgetter
+
 from models import FundingRate
 
+# Пороги ставки в процентах и эмодзи для интервалов между ними:
+# 🟢 низкая (<0.1%), 🟡 средняя, 🟠 высокая, 🔴 очень высокая (>=1%)
+_RATE_EMOJI_THRESHOLDS = (0.1, 0.5, 1.0)
+_RATE_EMOJIS = ("🟢", "🟡", "🟠", "🔴")
+
+# Эмодзи направления по знаку ставки: Short платят Long, нейтральная, Long платят Short
+_DIRECTION_EMOJIS = ("📉", "➖", "📈")
+
+# Часовой пояс отображения времени (МСК) и секунд в часе для обратного отсчета
+_UTC_PLUS_3 = timezone(timedelta(hours=3))
+_SECONDS_PER_HOUR = 3600
+
+# Разделители, заголовки и шаблоны строк таблиц (format_alert / format_grouped_report / format_hedging_opportunities)
+_SEPARATOR = '─' * 45
+_ALERT_TABLE_HEADER = f"{'Биржа':<10} │ {'Цена':<9} │ {'Rate':<9} │ {'⏱️':<7}\n"
+_ALERT_TABLE_SEP = f"{'─'*10}─┼─{'─'*9}─┼─{'─'*9}─┼─{'─'*7}\n"
+_ALERT_TABLE_ROW = "{exch:<10} │ {price:<9} │ {rate:<9} │ {cd:<7}\n"
+_GROUPED_TABLE_HEADER = f"{'Биржа':<10} │ {'Rate':<9} │ {'Время':<7}\n"
+_GROUPED_TABLE_SEP = f"{'─'*10}─┼─{'─'*9}─┼─{'─'*7}\n"
+_GROUPED_TABLE_ROW = "{exch:<10} │ {rate:<9} │ {time:<7}\n"
+_HEDGE_TABLE_HEADER = f"{'Биржа':<10} │ {'Rate':<9}\n"
+_HEDGE_TABLE_SEP = f"{'─'*10}─┼─{'─'*9}\n"
+_HEDGE_TABLE_ROW = "{exch:<10} │ {rate:<9}{marker}\n"
+_ALERT_LEGEND = (
+    "\n💡 <i>Легенда: 🔴 &gt;1% | 🟠 &gt;0.5% | 🟡 &gt;0.1% | 🟢 &lt;0.1%</i>\n"
+    "<i>📈 Long→Short | 📉 Short→Long</i>"
+)
+
+# Шаблоны ссылок на контракты по биржам ({token} - базовый токен, например BTC)
+_URL_TEMPLATES = {
+    'BYBIT': 'https://www.bybit.com/trade/usdt/{token}USDT',
+    'BINANCE': 'https://www.binance.com/en/futures/{token}USDT',
+    'MEXC': 'https://futures.mexc.com/exchange/{token}_USDT',
+    'GATE': 'https://www.gate.io/futures_trade/USDT/{token}_USDT',
+    'GATEIO': 'https://www.gate.io/futures_trade/USDT/{token}_USDT',
+    'KUCOIN': 'https://www.kucoin.com/futures/trade/{token}USDTM',
+    'BITGET': 'https://www.bitget.com/futures/usdt/{token}USDT',
+    'BINGX': 'https://bingx.com/en-us/swap/{token}-USDT/',
+    'BITMART': 'https://www.bitmart.com/contract/en?symbol={token}USDT',
+    'OKX': 'https://www.okx.com/trade-swap/{token_lower}-usdt-swap',
+}
+
+
+def _time_left(funding_time: datetime, now: datetime) -> Tuple[int, int]:
+    """Часы и минуты до funding (с округлением вниз)."""
+    hours, rem = divmod((funding_time - now).total_seconds(), _SECONDS_PER_HOUR)
+    return int(hours), int(rem // 60)
+
+
+def _countdown_str(funding_time: datetime, now: datetime) -> str:
+    """Обратный отсчет до funding в формате ЧЧ:ММ."""
+    return "{:02d}:{:02d}".format(*_time_left(funding_time, now))
+
+
+def _fmt_price(price: float, prefix: str = '') -> str:
+    """Цена для отчета: от 1000 - с разделителями без копеек, иначе 2 знака."""
+    return f"{prefix}{price:,.0f}" if price >= 1000 else f"{prefix}{price:.2f}"
+
+
+@lru_cache(maxsize=1024)
+def _fmt_time(moment: datetime, fmt: str) -> str:
+    """Время в UTC+3 по формату strftime (у бирж всего несколько окон funding - кэшируем)."""
+    return moment.astimezone(_UTC_PLUS_3).strftime(fmt)
+
 
 class MessageFormatter:
     """Форматирование сообщений для телеграм-бота."""
@@ -10,46 +78,25 @@ class MessageFormatter:
     @staticmethod
     def _get_rate_emoji(rate: float) -> str:
         """Возвращает эмодзи в зависимости от значения ставки."""
-        abs_rate = abs(rate * 100)
-        if abs_rate >= 1.0:
-            return "🔴"  # Очень высокая
-        elif abs_rate >= 0.5:
-            return "🟠"  # Высокая
-        elif abs_rate >= 0.1:
-            return "🟡"  # Средняя
-        else:
-            return "🟢"  # Низкая
+        return _RATE_EMOJIS[bisect_right(_RATE_EMOJI_THRESHOLDS, abs(rate * 100))]
     
     @staticmethod
     def _get_direction_emoji(rate: float) -> str:
         """Возвращает стрелку в зависимости от направления ставки."""
-        if rate > 0:
-            return "📈"  # Long платят Short
-        elif rate < 0:
-            return "📉"  # Short платят Long
-        else:
-            return "➖"  # Нейтральная
+        return _DIRECTION_EMOJIS[(rate > 0) - (rate < 0) + 1]
     
     @staticmethod
-    def _get_contract_link(exchange: str, symbol: str, token: str) -> str:
-        """Генерирует ссылку на контракт для конкретной биржи."""
-        # Очищаем символ от суффиксов
-        clean_symbol = symbol.replace('PERP', '').replace('_USDT', '').replace('-USDT', '')
-        
-        urls = {
-            'BYBIT': f'https://www.bybit.com/trade/usdt/{token}USDT',
-            'BINANCE': f'https://www.binance.com/en/futures/{token}USDT',
-            'MEXC': f'https://futures.mexc.com/exchange/{token}_USDT',
-            'GATE': f'https://www.gate.io/futures_trade/USDT/{token}_USDT',
-            'GATEIO': f'https://www.gate.io/futures_trade/USDT/{token}_USDT',
-            'KUCOIN': f'https://www.kucoin.com/futures/trade/{token}USDTM',
-            'BITGET': f'https://www.bitget.com/futures/usdt/{token}USDT',
-            'BINGX': f'https://bingx.com/en-us/swap/{token}-USDT/',
-            'BITMART': f'https://www.bitmart.com/contract/en?symbol={token}USDT',
-            'OKX': f'https://www.okx.com/trade-swap/{token.lower()}-usdt-swap',
-        }
+    @lru_cache(maxsize=4096)
+    def _get_contract_link(exchange: str, token: str) -> str:
+        """
+        Генерирует ссылку на контракт для конкретной биржи.
         
-        url = urls.get(exchange.upper(), '#')
+        Ссылка строится по базовому токену, символ контракта биржи не нужен.
+        Результат кэшируется: одни и те же токены выводятся в каждом отчете.
+        """
+        # Имена бирж из адаптеров уже в верхнем регистре - upper() только как запасной путь
+        template = _URL_TEMPLATES.get(exchange) or _URL_TEMPLATES.get(exchange.upper())
+        url = template.format(token=token, token_lower=token.lower()) if template else '#'
         # Возвращаем кликабельную ссылку в HTML формате
         return f'<a href="{url}">Открыть ↗</a>'
     
@@ -80,64 +127,54 @@ class MessageFormatter:
         
         # Рассчитываем время до следующего funding
         now = datetime.now(timezone.utc)
-        time_diff = top_rate.next_funding_time - now
-        hours = int(time_diff.total_seconds() // 3600)
-        minutes = int((time_diff.total_seconds() % 3600) // 60)
+        hours, minutes = _time_left(top_rate.next_funding_time, now)
         
         # Конвертируем в UTC+3 для отображения
-        local_time = top_rate.next_funding_time + timedelta(hours=3)
-        date_str = local_time.strftime('%d-%m-%Y %H:%M')
+        date_str = _fmt_time(top_rate.next_funding_time, '%d-%m-%Y %H:%M')
         
         # Эмодзи для заголовка
         emoji = MessageFormatter._get_rate_emoji(top_rate.rate)
         direction = MessageFormatter._get_direction_emoji(top_rate.rate)
         
+        # Части сообщения собираются в список и склеиваются один раз в конце
+        parts = []
+        
         # Формируем заголовок
         source_text = f" на {source_exchange}" if source_exchange else ""
-        header = f"\n{emoji} <b>АЛЕРТ: {token}{source_text}</b> {direction}\n"
-        header += f"⏰ Осталось: <b>{hours}ч {minutes}мин</b>\n"
-        header += f"📊 Порог: {threshold}% | 📅 {date_str} (UTC+3)\n"
-        header += f"{'─' * 45}\n\n"
+        parts.append(f"\n{emoji} <b>АЛЕРТ: {token}{source_text}</b> {direction}\n")
+        parts.append(f"⏰ Осталось: <b>{hours}ч {minutes}мин</b>\n")
+        parts.append(f"📊 Порог: {threshold}% | 📅 {date_str} (UTC+3)\n")
+        parts.append(f"{_SEPARATOR}\n\n")
         
         # Формируем таблицу с использованием HTML
-        table = "<pre>"
-        table += f"{'Биржа':<10} │ {'Цена':<9} │ {'Rate':<9} │ {'⏱️':<7}\n"
-        table += f"{'─'*10}─┼─{'─'*9}─┼─{'─'*9}─┼─{'─'*7}\n"
-        
-        for i, rate in enumerate(rates, 1):  # Показываем все биржи
-            time_to_funding = rate.next_funding_time - now
-            hours_left = int(time_to_funding.total_seconds() // 3600)
-            mins_left = int((time_to_funding.total_seconds() % 3600) // 60)
-            countdown = f"{hours_left:02d}:{mins_left:02d}"
+        parts.append("<pre>")
+        parts.append(_ALERT_TABLE_HEADER)
+        parts.append(_ALERT_TABLE_SEP)
+        
+        for rate in rates:  # Показываем все биржи
+            countdown = _countdown_str(rate.next_funding_time, now)
             
             # Форматируем процент со знаком
-            rate_pct = rate.rate_percentage
-            rate_str = f"{rate_pct:+.4f}%"
-            
-            # Эмодзи для каждой биржи
-            rate_emoji = MessageFormatter._get_rate_emoji(rate.rate)
+            rate_str = f"{rate.rate_percentage:+.4f}%"
             
             # Форматируем цену
-            if rate.price >= 1000:
-                price_str = f"{rate.price:,.0f}"
-            else:
-                price_str = f"{rate.price:.2f}"
+            price_str = _fmt_price(rate.price)
             
-            table += f"{rate.exchange:<10} │ {price_str:<9} │ {rate_str:<9} │ {countdown:<7}\n"
+            parts.append(_ALERT_TABLE_ROW.format(exch=rate.exchange, price=price_str, rate=rate_str, cd=countdown))
         
-        table += "</pre>"
+        parts.append("</pre>")
         
         # Добавляем ссылки на контракты
-        links = "📊 <b>Ссылки на контракты:</b>\n"
+        parts.append("📊 <b>Ссылки на контракты:</b>\n")
         for rate in rates:
-            link = MessageFormatter._get_contract_link(rate.exchange, rate.symbol, token)
-            links += f"  • <b>{rate.exchange}</b>: {link}\n"
+            exch = rate.exchange
+            link = MessageFormatter._get_contract_link(exch, token)
+            parts.append(f"  • <b>{exch}</b>: {link}\n")
         
         # Добавляем легенду
-        legend = f"\n💡 <i>Легенда: 🔴 &gt;1% | 🟠 &gt;0.5% | 🟡 &gt;0.1% | 🟢 &lt;0.1%</i>\n"
-        legend += f"<i>📈 Long→Short | 📉 Short→Long</i>"
+        parts.append(_ALERT_LEGEND)
         
-        return header + table + links + legend
+        return "".join(parts)
     
     @staticmethod
     def format_grouped_report(
@@ -157,41 +194,39 @@ class MessageFormatter:
         if not grouped_rates:
             return "❌ Нет данных для отображения"
         
-        # Сортируем токены по максимальной абсолютной ставке
-        sorted_tokens = sorted(
-            grouped_rates.items(),
-            key=lambda x: max(r.abs_rate for r in x[1]),
-            reverse=True
-        )[:limit]
+        # Сортируем токены по максимальной абсолютной ставке: максимум считаем
+        # один раз на токен (decorate-sort-undecorate)
+        decorated = [
+            (max(r.abs_rate for r in rates), token, rates)
+            for token, rates in grouped_rates.items()
+        ]
+        decorated.sort(key=itemgetter(0), reverse=True)
+        sorted_tokens = [(token, rates) for _, token, rates in decorated[:limit]]
         
         # Получаем информацию о времени funding
         now = datetime.now(timezone.utc)
+        # Ставки каждого токена по биржам (при повторе биржи - первая, как в списке)
+        rates_by_exchange = {
+            token: {r.exchange: r for r in reversed(rates)}
+            for token, rates in sorted_tokens
+        }
+        
         first_token_rates = sorted_tokens[0][1] if sorted_tokens else []
         if first_token_rates:
             # Берем время от первой ставки (должно быть от Bybit)
-            bybit_rate = next((r for r in first_token_rates if r.exchange == "BYBIT"), first_token_rates[0])
-            funding_time_local = bybit_rate.next_funding_time + timedelta(hours=3)
-            time_str = funding_time_local.strftime('%H:%M')
-            date_str = funding_time_local.strftime('%d.%m')
-            
-            # Проверяем что все токены из одной временной группы
-            all_same_time = True
-            for token, rates in sorted_tokens:
-                bybit_rate_token = next((r for r in rates if r.exchange == "BYBIT"), None)
-                if bybit_rate_token:
-                    time_diff_check = abs((bybit_rate_token.next_funding_time - bybit_rate.next_funding_time).total_seconds() / 60)
-                    if time_diff_check > 5:  # Более 5 минут разницы
-                        all_same_time = False
-                        import logging
-                        logging.warning(f"⚠️  Token {token} has different funding time: {bybit_rate_token.next_funding_time} (diff: {time_diff_check:.1f} min)")
+            bybit_rate = rates_by_exchange[sorted_tokens[0][0]].get("BYBIT", first_token_rates[0])
+            time_str = _fmt_time(bybit_rate.next_funding_time, '%H:%M')
+            date_str = _fmt_time(bybit_rate.next_funding_time, '%d.%m')
         else:
             time_str, date_str = "N/A", "N/A"
         
         # Заголовок
-        message = f"\n🏆 <b>ТОП-{len(sorted_tokens)} ТОКЕНОВ</b>\n"
-        message += f"⏰ Bybit funding: <b>{time_str}</b> ({date_str}, UTC+3)\n"
-        message += f"<i>Другие биржи могут иметь другое время ⬇️</i>\n"
-        message += f"{'─' * 45}\n\n"
+        parts = [
+            f"\n🏆 <b>ТОП-{len(sorted_tokens)} ТОКЕНОВ</b>\n",
+            f"⏰ Bybit funding: <b>{time_str}</b> ({date_str}, UTC+3)\n",
+            "<i>Другие биржи могут иметь другое время ⬇️</i>\n",
+            f"{_SEPARATOR}\n\n",
+        ]
         
         # Для каждого токена создаем красивую карточку
         for i, (token, rates) in enumerate(sorted_tokens, 1):
@@ -203,54 +238,49 @@ class MessageFormatter:
             direction = MessageFormatter._get_direction_emoji(top_rate.rate)
             
             # Получаем Bybit время для этого токена
-            bybit_rate = next((r for r in rates if r.exchange == "BYBIT"), top_rate)
-            token_time_local = bybit_rate.next_funding_time + timedelta(hours=3)
-            token_time_str = token_time_local.strftime('%H:%M')
+            bybit_rate = rates_by_exchange[token].get("BYBIT", top_rate)
+            token_time_str = _fmt_time(bybit_rate.next_funding_time, '%H:%M')
             
             # Заголовок токена с временем
-            message += f"\n{emoji} <b>{i}. {token}</b> {direction} "
-            message += f"<i>(⏰ {token_time_str})</i>\n"
+            parts.append(f"\n{emoji} <b>{i}. {token}</b> {direction} ")
+            parts.append(f"<i>(⏰ {token_time_str})</i>\n")
             
             # Форматируем цену
-            if top_rate.price >= 1000:
-                price_str = f"${top_rate.price:,.0f}"
-            else:
-                price_str = f"${top_rate.price:.2f}"
+            price_str = _fmt_price(top_rate.price, '$')
             
-            message += f"💰 Цена: {price_str}\n"
+            parts.append(f"💰 Цена: {price_str}\n")
             
             # Таблица с биржами (показываем время для каждой)
-            message += "<pre>"
-            message += f"{'Биржа':<10} │ {'Rate':<9} │ {'Время':<7}\n"
-            message += f"{'─'*10}─┼─{'─'*9}─┼─{'─'*7}\n"
+            parts.append("<pre>")
+            parts.append(_GROUPED_TABLE_HEADER)
+            parts.append(_GROUPED_TABLE_SEP)
             
+            # Строки таблицы и ссылки на контракты собираем за один проход по ставкам
+            rows = []
+            links = []
             for rate in rates:  # Показываем все биржи
+                exch = rate.exchange
                 rate_str = f"{rate.rate_percentage:+.4f}%"
                 
                 # Конкретное время funding для этой биржи (UTC+3)
-                rate_time_local = rate.next_funding_time + timedelta(hours=3)
-                time_str = rate_time_local.strftime('%H:%M')
+                time_str = _fmt_time(rate.next_funding_time, '%H:%M')
                 
-                message += f"{rate.exchange:<10} │ {rate_str:<9} │ {time_str:<7}\n"
+                rows.append(_GROUPED_TABLE_ROW.format(exch=exch, rate=rate_str, time=time_str))
+                links.append(f"  • <b>{exch}</b>: {MessageFormatter._get_contract_link(exch, token)}\n")
             
-            message += "</pre>\n"
+            parts.append("".join(rows))
+            parts.append("</pre>\n")
             
             # Таблица со ссылками на контракты (без pre, чтобы ссылки работали)
-            message += "📊 <b>Ссылки на контракты:</b>\n"
-            
-            for rate in rates:
-                # Генерируем ссылку на контракт
-                link = MessageFormatter._get_contract_link(rate.exchange, rate.symbol, token)
-                message += f"  • <b>{rate.exchange}</b>: {link}\n"
-            
-            message += ""
+            parts.append("📊 <b>Ссылки на контракты:</b>\n")
+            parts.append("".join(links))
         
         # Добавляем легенду
-        message += f"\n💡 <i>🔴 Очень высокая | 🟠 Высокая | 🟡 Средняя | 🟢 Низкая</i>\n"
-        message += f"<i>📈 Long→Short | 📉 Short→Long</i>\n"
-        message += f"<i>⏰ Все времена в UTC+3 (МСК). Разные биржи = разное время funding</i>"
+        parts.append("\n💡 <i>🔴 Очень высокая | 🟠 Высокая | 🟡 Средняя | 🟢 Низкая</i>\n")
+        parts.append("<i>📈 Long→Short | 📉 Short→Long</i>\n")
+        parts.append("<i>⏰ Все времена в UTC+3 (МСК). Разные биржи = разное время funding</i>")
         
-        return message
+        return "".join(parts)
     
     @staticmethod
     def format_simple_list(rates: List[FundingRate], limit: int = 10) -> str:
@@ -267,17 +297,19 @@ class MessageFormatter:
         if not rates:
             return "Нет данных"
         
-        message = "```\n"
-        message += f"{'№':<3} {'Exchange':<10} {'Symbol':<12} {'Rate':<10} {'Price':<12}\n"
-        message += "-" * 60 + "\n"
+        parts = [
+            "```\n",
+            f"{'№':<3} {'Exchange':<10} {'Symbol':<12} {'Rate':<10} {'Price':<12}\n",
+            "-" * 60 + "\n",
+        ]
         
         for i, rate in enumerate(rates[:limit], 1):
             rate_str = f"{rate.rate_percentage:+.4f}%"
-            message += f"{i:<3} {rate.exchange:<10} {rate.symbol:<12} {rate_str:<10} ${rate.price:<11.2f}\n"
+            parts.append(f"{i:<3} {rate.exchange:<10} {rate.symbol:<12} {rate_str:<10} ${rate.price:<11.2f}\n")
         
-        message += "```"
+        parts.append("```")
         
-        return message
+        return "".join(parts)
     
     @staticmethod
     def format_hedging_opportunities(opportunities: List[Dict], limit: int = 5) -> str:
@@ -286,6 +318,7 @@ class MessageFormatter:
         
         Args:
             opportunities: Список словарей с информацией о возможностях
+                (из find_hedging_opportunities, all_rates отсортирован по rate)
             limit: Количество возможностей для отображения
             
         Returns:
@@ -295,9 +328,13 @@ class MessageFormatter:
             return "❌ Не найдено возможностей для хеджирования с заданными параметрами"
         
         # Заголовок
-        message = f"\n💎 <b>ВОЗМОЖНОСТИ ДЛЯ ХЕДЖИРОВАНИЯ</b>\n"
-        message += f"<i>Найдено: {len(opportunities)} | Показано топ-{min(limit, len(opportunities))}</i>\n"
-        message += f"{'─' * 45}\n\n"
+        parts = [
+            "\n💎 <b>ВОЗМОЖНОСТИ ДЛЯ ХЕДЖИРОВАНИЯ</b>\n",
+            f"<i>Найдено: {len(opportunities)} | Показано топ-{min(limit, len(opportunities))}</i>\n",
+            f"{_SEPARATOR}\n\n",
+        ]
+        
+        now = datetime.now(timezone.utc)
         
         # Показываем топ возможностей
         for i, opp in enumerate(opportunities[:limit], 1):
@@ -317,69 +354,63 @@ class MessageFormatter:
                 spread_emoji = "💵"  # Средний спред
             
             # Заголовок возможности
-            message += f"{spread_emoji} <b>{i}. {token}</b>\n"
-            message += f"📊 Спред: <b>{spread:.4f}%</b>\n"
+            parts.append(f"{spread_emoji} <b>{i}. {token}</b>\n")
+            parts.append(f"📊 Спред: <b>{spread:.4f}%</b>\n")
             
             # Форматируем цену
-            if long_rate.price >= 1000:
-                price_str = f"${long_rate.price:,.0f}"
-            else:
-                price_str = f"${long_rate.price:.2f}"
-            message += f"💰 Цена: {price_str}\n\n"
+            price_str = _fmt_price(long_rate.price, '$')
+            parts.append(f"💰 Цена: {price_str}\n\n")
             
             # Стратегия
-            message += f"<b>🎯 Стратегия:</b>\n"
-            message += f"📈 LONG на <b>{long_exch}</b>: {long_rate.rate_percentage:+.4f}%\n"
-            message += f"📉 SHORT на <b>{short_exch}</b>: {short_rate.rate_percentage:+.4f}%\n\n"
+            parts.append("<b>🎯 Стратегия:</b>\n")
+            parts.append(f"📈 LONG на <b>{long_exch}</b>: {long_rate.rate_percentage:+.4f}%\n")
+            parts.append(f"📉 SHORT на <b>{short_exch}</b>: {short_rate.rate_percentage:+.4f}%\n\n")
             
             # Потенциальная прибыль
             profit_per_cycle = spread
-            message += f"💵 Прибыль за цикл: <b>~{profit_per_cycle:.4f}%</b>\n"
+            parts.append(f"💵 Прибыль за цикл: <b>~{profit_per_cycle:.4f}%</b>\n")
             
             # Информация о времени
-            from datetime import timezone, timedelta
-            now = datetime.now(timezone.utc)
-            time_to_funding = long_rate.next_funding_time - now
-            hours = int(time_to_funding.total_seconds() // 3600)
-            minutes = int((time_to_funding.total_seconds() % 3600) // 60)
+            hours, minutes = _time_left(long_rate.next_funding_time, now)
             
-            message += f"⏰ До funding: <b>{hours}ч {minutes}мин</b>\n\n"
+            parts.append(f"⏰ До funding: <b>{hours}ч {minutes}мин</b>\n\n")
             
             # Таблица со всеми биржами
-            message += "<pre>"
-            message += f"{'Биржа':<10} │ {'Rate':<9}\n"
-            message += f"{'─'*10}─┼─{'─'*9}\n"
-            
-            # Сортируем от минимальной к максимальной ставке
-            sorted_rates = sorted(opp['all_rates'], key=lambda x: x.rate)
-            for rate in sorted_rates:
+            parts.append("<pre>")
+            parts.append(_HEDGE_TABLE_HEADER)
+            parts.append(_HEDGE_TABLE_SEP)
+            
+            # all_rates приходит из find_hedging_opportunities уже отсортированным
+            # от минимальной к максимальной ставке
+            for rate in opp['all_rates']:
+                exch = rate.exchange
                 rate_str = f"{rate.rate_percentage:+.4f}%"
                 # Отмечаем выбранные биржи
                 marker = ""
-                if rate.exchange == long_exch:
+                if exch == long_exch:
                     marker = " 📈"
-                elif rate.exchange == short_exch:
+                elif exch == short_exch:
                     marker = " 📉"
                 
-                message += f"{rate.exchange:<10} │ {rate_str:<9}{marker}\n"
+                parts.append(_HEDGE_TABLE_ROW.format(exch=exch, rate=rate_str, marker=marker))
             
-            message += "</pre>\n"
+            parts.append("</pre>\n")
             
             # Ссылки на контракты
-            message += "📊 <b>Ссылки:</b>\n"
-            long_link = MessageFormatter._get_contract_link(long_exch, long_rate.symbol, token)
-            short_link = MessageFormatter._get_contract_link(short_exch, short_rate.symbol, token)
-            message += f"  • <b>{long_exch}</b> (LONG): {long_link}\n"
-            message += f"  • <b>{short_exch}</b> (SHORT): {short_link}\n"
+            parts.append("📊 <b>Ссылки:</b>\n")
+            long_link = MessageFormatter._get_contract_link(long_exch, token)
+            short_link = MessageFormatter._get_contract_link(short_exch, token)
+            parts.append(f"  • <b>{long_exch}</b> (LONG): {long_link}\n")
+            parts.append(f"  • <b>{short_exch}</b> (SHORT): {short_link}\n")
             
             # Разделитель между возможностями
             if i < min(limit, len(opportunities)):
-                message += f"\n{'─' * 45}\n\n"
+                parts.append(f"\n{_SEPARATOR}\n\n")
         
         # Легенда
-        message += f"\n\n💡 <i>Спред = разница между макс и мин ставками</i>\n"
-        message += f"<i>📈 LONG = покупка | 📉 SHORT = продажа</i>\n"
-        message += f"<i>🔥 &gt;1% | 💰 &gt;0.5% | 💵 &gt;0.3%</i>\n"
-        message += f"\n⚠️ <b>Важно:</b> <i>Учитывайте комиссии, проскальзывание и риски</i>"
+        parts.append("\n\n💡 <i>Спред = разница между макс и мин ставками</i>\n")
+        parts.append("<i>📈 LONG = покупка | 📉 SHORT = продажа</i>\n")
+        parts.append("<i>🔥 &gt;1% | 💰 &gt;0.5% | 💵 &gt;0.3%</i>\n")
+        parts.append("\n⚠️ <b>Важно:</b> <i>Учитывайте комиссии, проскальзывание и риски</i>")
         
-        return message
+        return "".join(parts)
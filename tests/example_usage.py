@@ -1,5 +1,7 @@
 """Примеры использования системы мониторинга funding rates."""
+import asyncio
 import logging
+from operator import attrgetter
 from exchanges import (
     BybitAdapter,
     BinanceAdapter,
@@ -33,10 +35,10 @@ def example_1_get_top_rates():
     ]
     
     # Создание агрегатора
-    aggregator = FundingRateAggregator(exchanges, max_workers=5)
+    aggregator = FundingRateAggregator(exchanges)
     
     # Получение топ ставок
-    top_rates = aggregator.get_top_rates(limit=10, by_abs=True)
+    top_rates = asyncio.run(aggregator.get_top_rates(limit=10, by_abs=True))
     
     # Форматирование и вывод
     formatter = MessageFormatter()
@@ -44,7 +46,7 @@ def example_1_get_top_rates():
     print(message)
 
 
-def example_2_get_rates_by_token():
+async def example_2_get_rates_by_token():
     """Пример 2: Получить ставки для конкретного токена от всех бирж."""
     print("\n" + "="*80)
     print("ПРИМЕР 2: Ставки для BTC от всех доступных бирж")
@@ -59,21 +61,25 @@ def example_2_get_rates_by_token():
         MexcAdapter(),
     ]
     
-    aggregator = FundingRateAggregator(exchanges, max_workers=5)
+    symbol_variants = FundingRateAggregator._get_symbol_variants(token, 'USDT')
     
-    # Получаем ставки для BTC
-    rates = []
-    for exchange in exchanges:
-        symbol_variants = FundingRateAggregator._get_symbol_variants(token, 'USDT')
+    async def get_first_rate(exchange):
+        """Первый вариант символа, по которому биржа вернула ставку."""
         for symbol in symbol_variants:
-            rate = exchange.get_funding_rate(symbol)
+            rate = await exchange.get_funding_rate(symbol)
             if rate:
-                rates.append(rate)
-                break
+                return rate
+        return None
+    
+    # Получаем ставки для BTC от всех бирж параллельно;
+    # при выходе из контекста агрегатор закрывает клиенты бирж
+    async with FundingRateAggregator(exchanges):
+        results = await asyncio.gather(*(get_first_rate(exchange) for exchange in exchanges))
+    rates = [rate for rate in results if rate]
     
     if rates:
         # Сортируем по абсолютной ставке
-        rates.sort(key=lambda x: x.abs_rate, reverse=True)
+        rates.sort(key=attrgetter('abs_rate'), reverse=True)
         
         formatter = MessageFormatter()
         message = formatter.format_alert(
@@ -99,11 +105,11 @@ def example_3_get_grouped_by_token():
         GateioAdapter(),
     ]
     
-    aggregator = FundingRateAggregator(exchanges, max_workers=10)
+    aggregator = FundingRateAggregator(exchanges)
     
     # Получаем топ контракты, сгруппированные по токенам
     print("Получаю топ контракты от Bybit и данные от других бирж...")
-    grouped = aggregator.get_grouped_by_token(top_contracts_limit=10)
+    grouped = asyncio.run(aggregator.get_grouped_by_token(top_contracts_limit=10))
     
     # Форматируем и выводим
     formatter = MessageFormatter()
@@ -111,7 +117,7 @@ def example_3_get_grouped_by_token():
     print(message)
 
 
-def example_4_check_specific_exchanges():
+async def example_4_check_specific_exchanges():
     """Пример 4: Проверить доступность конкретных бирж."""
     print("\n" + "="*80)
     print("ПРИМЕР 4: Проверка доступности бирж")
@@ -127,25 +133,29 @@ def example_4_check_specific_exchanges():
         BingxAdapter(),
     ]
     
-    for exchange in exchanges:
-        try:
-            is_available = exchange.is_available()
-            status = "✅ Доступна" if is_available else "❌ Недоступна"
+    async with FundingRateAggregator(exchanges):
+        results = await asyncio.gather(
+            *(exchange.is_available() for exchange in exchanges),
+            return_exceptions=True
+        )
+    
+    for exchange, result in zip(exchanges, results):
+        if isinstance(result, Exception):
+            print(f"{exchange.name:<12} - ❌ Ошибка: {str(result)[:50]}")
+        else:
+            status = "✅ Доступна" if result else "❌ Недоступна"
             print(f"{exchange.name:<12} - {status}")
-        except Exception as e:
-            print(f"{exchange.name:<12} - ❌ Ошибка: {str(e)[:50]}")
 
 
-def example_5_single_exchange_top_contracts():
+async def example_5_single_exchange_top_contracts():
     """Пример 5: Получить топ контракты от одной биржи."""
     print("\n" + "="*80)
     print("ПРИМЕР 5: Топ-20 контрактов от Bybit")
     print("="*80 + "\n")
     
-    bybit = BybitAdapter()
-    
     # Получаем топ контракты (теперь с настраиваемым лимитом)
-    contracts = bybit.get_top_contracts(limit=20)
+    async with BybitAdapter() as bybit:
+        contracts = await bybit.get_top_contracts(limit=20)
     
     print(f"Получено контрактов: {len(contracts)}\n")
     print(f"{'№':<4} {'Symbol':<15} {'Base':<10} {'Quote'}")
@@ -163,16 +173,16 @@ def main():
     
     try:
         # Запускаем примеры по очереди
-        example_4_check_specific_exchanges()
+        asyncio.run(example_4_check_specific_exchanges())
         
-        example_5_single_exchange_top_contracts()
+        asyncio.run(example_5_single_exchange_top_contracts())
         
         example_1_get_top_rates()
         
         # Закомментируйте примеры ниже, если не хотите долго ждать
         # (они делают много запросов к API)
         
-        # example_2_get_rates_by_token()
+        # asyncio.run(example_2_get_rates_by_token())
         
         # example_3_get_grouped_by_token()
         
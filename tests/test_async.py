@@ -20,16 +20,21 @@ logger = logging.getLogger(__name__)
 
 
 async def test_single_exchange(exchange, symbol='BTCUSDT'):
-    """Тест одной биржи."""
-    print(f"\n{'='*80}")
-    print(f"Тестирование: {exchange.name}")
-    print(f"{'='*80}")
+    """
+    Тест одной биржи.
     
+    Биржи тестируются параллельно, поэтому сначала выполняется запрос,
+    а затем весь отчет по бирже печатается одним блоком.
+    """
     try:
         # Тест 1: Получение funding rate для BTC
-        print(f"\n[1] Получение funding rate для {symbol}...")
         rate = await exchange.get_funding_rate(symbol)
         
+        print(f"\n{'='*80}")
+        print(f"Тестирование: {exchange.name}")
+        print(f"{'='*80}")
+        print(f"\n[1] Получение funding rate для {symbol}...")
+        
         if rate:
             print(f"✅ Успешно!")
             print(f"   Символ: {rate.symbol}")
@@ -45,6 +50,9 @@ async def test_single_exchange(exchange, symbol='BTCUSDT'):
         return rate is not None
         
     except Exception as e:
+        print(f"\n{'='*80}")
+        print(f"Тестирование: {exchange.name}")
+        print(f"{'='*80}")
         print(f"❌ Ошибка: {e}")
         await exchange.close()
         return False
@@ -92,22 +100,14 @@ async def test_aggregator():
             for rate in rates[:3]:
                 print(f"      - {rate.exchange}: {rate.rate_percentage:+.4f}%")
             print()
-        
-        # Закрываем все клиенты
-        for exchange in exchanges:
-            await exchange.close()
             
     except Exception as e:
         print(f"❌ Ошибка: {e}")
         import traceback
         traceback.print_exc()
-        
-        # Закрываем клиенты даже при ошибке
-        for exchange in exchanges:
-            try:
-                await exchange.close()
-            except:
-                pass
+    finally:
+        # Закрываем все клиенты параллельно (и при ошибке тоже)
+        await aggregator.aclose()
 
 
 async def quick_test():
@@ -122,10 +122,12 @@ async def quick_test():
         (BinanceAdapter(), 'BTCUSDT'),
     ]
     
-    results = {}
-    for exchange, symbol in exchanges:
-        success = await test_single_exchange(exchange, symbol)
-        results[exchange.name] = success
+    # Все биржи опрашиваются одновременно
+    results_list = await asyncio.gather(
+        *(test_single_exchange(exchange, symbol) for exchange, symbol in exchanges),
+        return_exceptions=True
+    )
+    results = {exchange.name: result is True for (exchange, _), result in zip(exchanges, results_list)}
     
     # Статистика
     print(f"\n{'='*80}")
@@ -155,10 +157,12 @@ async def full_test():
         (KucoinAdapter(), 'XBTUSDTM'),
     ]
     
-    results = {}
-    for exchange, symbol in exchanges:
-        success = await test_single_exchange(exchange, symbol)
-        results[exchange.name] = success
+    # Все биржи опрашиваются одновременно
+    results_list = await asyncio.gather(
+        *(test_single_exchange(exchange, symbol) for exchange, symbol in exchanges),
+        return_exceptions=True
+    )
+    results = {exchange.name: result is True for (exchange, _), result in zip(exchanges, results_list)}
     
     # Статистика
     print(f"\n{'='*80}")
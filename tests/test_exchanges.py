@@ -1,5 +1,7 @@
 """Скрипт для тестирования работы адаптеров бирж."""
+import asyncio
 import logging
+import sys
 import time
 from datetime import datetime
 
@@ -20,85 +22,187 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Ограничения времени на проверки (сек): зависшая биржа не затягивает весь прогон
+AVAILABILITY_TIMEOUT = 3.0
+CONTRACTS_TIMEOUT = 5.0
+FUNDING_RATE_TIMEOUT = 8.0
 
-def test_exchange(exchange, test_symbol='BTCUSDT'):
+
+# Адаптеры по классам: один экземпляр (и пул соединений) на весь прогон
+_ADAPTERS = {}
+
+
+def _get_adapter(adapter_cls):
+    """Получить общий экземпляр адаптера, создав его при первом обращении."""
+    adapter = _ADAPTERS.get(adapter_cls)
+    if adapter is None:
+        adapter = _ADAPTERS[adapter_cls] = adapter_cls()
+    return adapter
+
+
+async def _run(test):
+    """Запустить тест и закрыть клиенты всех созданных адаптеров."""
+    try:
+        await test()
+    finally:
+        await asyncio.gather(*(adapter.close() for adapter in _ADAPTERS.values()))
+
+
+def _elapsed(start_ns: int) -> float:
+    """Секунды, прошедшие с отметки perf_counter_ns (монотонные часы, без скачков NTP)."""
+    return (time.perf_counter_ns() - start_ns) / 1e9
+
+
+async def _first_funding_rate(exchange, variants):
+    """
+    Запрашивает все варианты символа одновременно и возвращает первую
+    полученную ставку, отменяя остальные запросы.
+    
+    Если ставка не получена и какой-то запрос упал - пробрасывает его ошибку.
+    """
+    tasks = [asyncio.create_task(exchange.get_funding_rate(v)) for v in variants]
+    error = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                rate = await next_done
+            except Exception as e:
+                error = error or e
+                continue
+            if rate:
+                return rate
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    if error:
+        raise error
+    return None
+
+
+async def _fetch_and_pick(exchange, variants):
+    """
+    Ставка для первого найденного варианта символа.
+    
+    Биржи с SUPPORTS_BULK_FUNDING_RATES отдают всю таблицу ставок одним
+    запросом - ищем символ в ней. У остальных get_all_funding_rates
+    дороже отдельных запросов, поэтому варианты запрашиваются напрямую.
+    """
+    if not exchange.SUPPORTS_BULK_FUNDING_RATES:
+        return await _first_funding_rate(exchange, variants)
+    
+    by_symbol = {r.symbol: r for r in await exchange.get_all_funding_rates()}
+    return next((by_symbol[v] for v in variants if v in by_symbol), None)
+
+
+async def test_exchange(exchange, test_symbol='BTCUSDT'):
     """
     Тестирование одной биржи.
     
+    Биржи тестируются параллельно, поэтому вывод не печатается сразу,
+    а копится в списке строк и выводится вызывающим после gather.
+    
     Args:
         exchange: Экземпляр адаптера биржи
         test_symbol: Символ для тестирования
+        
+    Returns:
+        (успех, строки отчета)
     """
-    print(f"\n{'='*80}")
-    print(f"Тестирование: {exchange.name}")
-    print(f"{'='*80}")
+    report = []
+    try:
+        success = await _run_exchange_checks(exchange, test_symbol, report.append)
+    except Exception as e:
+        logger.error(f"Критическая ошибка при тестировании {exchange.name}: {e}")
+        report.append(f"❌ Критическая ошибка: {e}")
+        success = False
+    return success, report
+
+
+def _print_report(report):
+    """Вывести отчет по бирже одной записью в stdout."""
+    sys.stdout.write("\n".join(report) + "\n")
+
+
+async def _run_exchange_checks(exchange, test_symbol, echo):
+    """Проверки одной биржи; echo добавляет строку в отчет."""
+    echo(f"\n{'='*80}")
+    echo(f"Тестирование: {exchange.name}")
+    echo(f"{'='*80}")
     
     # Тест 1: Проверка доступности
-    print("\n[1] Проверка доступности...")
-    start = time.time()
+    echo("\n[1] Проверка доступности...")
+    start = time.perf_counter_ns()
     try:
-        is_available = exchange.is_available()
-        elapsed = time.time() - start
+        is_available = await asyncio.wait_for(exchange.is_available(), timeout=AVAILABILITY_TIMEOUT)
+        elapsed = _elapsed(start)
         if is_available:
-            print(f"✅ Биржа доступна (время ответа: {elapsed:.2f}s)")
+            echo(f"✅ Биржа доступна (время ответа: {elapsed:.2f}s)")
         else:
-            print(f"❌ Биржа недоступна")
+            echo(f"❌ Биржа недоступна")
             return False
+    except asyncio.TimeoutError:
+        echo(f"⏱️  Таймаут проверки доступности ({AVAILABILITY_TIMEOUT:.0f}s)")
+        return False
     except Exception as e:
-        elapsed = time.time() - start
-        print(f"❌ Ошибка при проверке доступности: {e} ({elapsed:.2f}s)")
+        elapsed = _elapsed(start)
+        echo(f"❌ Ошибка при проверке доступности: {e} ({elapsed:.2f}s)")
         return False
     
     # Тест 2: Получение топ контрактов
-    print("\n[2] Получение топ-5 контрактов...")
-    start = time.time()
+    echo("\n[2] Получение топ-5 контрактов...")
+    start = time.perf_counter_ns()
     try:
-        contracts = exchange.get_top_contracts(limit=5)
-        elapsed = time.time() - start
+        contracts = await asyncio.wait_for(exchange.get_top_contracts(limit=5), timeout=CONTRACTS_TIMEOUT)
+        elapsed = _elapsed(start)
         if contracts:
-            print(f"✅ Получено {len(contracts)} контрактов ({elapsed:.2f}s)")
+            echo(f"✅ Получено {len(contracts)} контрактов ({elapsed:.2f}s)")
             for i, contract in enumerate(contracts[:3], 1):
-                print(f"   {i}. {contract.symbol} ({contract.base_currency}/{contract.quote_currency})")
+                echo(f"   {i}. {contract.symbol} ({contract.base_currency}/{contract.quote_currency})")
         else:
-            print(f"⚠️  Контракты не получены ({elapsed:.2f}s)")
+            echo(f"⚠️  Контракты не получены ({elapsed:.2f}s)")
+    except asyncio.TimeoutError:
+        echo(f"⏱️  Таймаут получения контрактов ({CONTRACTS_TIMEOUT:.0f}s)")
     except Exception as e:
-        elapsed = time.time() - start
-        print(f"❌ Ошибка при получении контрактов: {e} ({elapsed:.2f}s)")
+        elapsed = _elapsed(start)
+        echo(f"❌ Ошибка при получении контрактов: {e} ({elapsed:.2f}s)")
     
     # Тест 3: Получение funding rate для конкретного символа
-    print(f"\n[3] Получение funding rate для {test_symbol}...")
-    start = time.time()
+    echo(f"\n[3] Получение funding rate для {test_symbol}...")
+    start = time.perf_counter_ns()
     try:
-        # Пробуем разные варианты символа
-        test_variants = [
+        # Пробуем разные варианты символа (одновременно, без повторов)
+        test_variants = list(dict.fromkeys([
             test_symbol,
             test_symbol.replace('USDT', '_USDT'),
             test_symbol.replace('USDT', '-USDT'),
-        ]
+        ]))
         
-        rate = None
-        for variant in test_variants:
-            rate = exchange.get_funding_rate(variant)
-            if rate:
-                break
+        rate = await asyncio.wait_for(
+            _fetch_and_pick(exchange, test_variants),
+            timeout=FUNDING_RATE_TIMEOUT
+        )
         
-        elapsed = time.time() - start
+        elapsed = _elapsed(start)
         if rate:
-            print(f"✅ Funding rate получен ({elapsed:.2f}s)")
-            print(f"   Символ: {rate.symbol}")
-            print(f"   Ставка: {rate.rate_percentage:+.4f}%")
-            print(f"   Цена: ${rate.price:.2f}")
-            print(f"   Следующий funding: {rate.next_funding_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            echo(f"✅ Funding rate получен ({elapsed:.2f}s)")
+            echo(f"   Символ: {rate.symbol}")
+            echo(f"   Ставка: {rate.rate_percentage:+.4f}%")
+            echo(f"   Цена: ${rate.price:.2f}")
+            echo(f"   Следующий funding: {rate.next_funding_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
         else:
-            print(f"⚠️  Funding rate не получен ({elapsed:.2f}s)")
+            echo(f"⚠️  Funding rate не получен ({elapsed:.2f}s)")
+    except asyncio.TimeoutError:
+        echo(f"⏱️  Таймаут получения funding rate ({FUNDING_RATE_TIMEOUT:.0f}s)")
     except Exception as e:
-        elapsed = time.time() - start
-        print(f"❌ Ошибка при получении funding rate: {e} ({elapsed:.2f}s)")
+        elapsed = _elapsed(start)
+        echo(f"❌ Ошибка при получении funding rate: {e} ({elapsed:.2f}s)")
     
     return True
 
 
-def test_all_exchanges():
+async def test_all_exchanges():
     """Тестирование всех бирж."""
     print("\n" + "="*80)
     print(" ТЕСТИРОВАНИЕ ВСЕХ АДАПТЕРОВ БИРЖ")
@@ -106,24 +210,25 @@ def test_all_exchanges():
     print(f"Время начала: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     exchanges = [
-        (BybitAdapter(), 'BTCUSDT'),
-        (BinanceAdapter(), 'BTCUSDT'),
-        (MexcAdapter(), 'BTC_USDT'),
-        (GateioAdapter(), 'BTC_USDT'),
-        (KucoinAdapter(), 'XBTUSDTM'),  # KuCoin использует другой формат
-        (BitgetAdapter(), 'BTCUSDT'),
-        (BingxAdapter(), 'BTC-USDT'),
+        (_get_adapter(BybitAdapter), 'BTCUSDT'),
+        (_get_adapter(BinanceAdapter), 'BTCUSDT'),
+        (_get_adapter(MexcAdapter), 'BTC_USDT'),
+        (_get_adapter(GateioAdapter), 'BTC_USDT'),
+        (_get_adapter(KucoinAdapter), 'XBTUSDTM'),  # KuCoin использует другой формат
+        (_get_adapter(BitgetAdapter), 'BTCUSDT'),
+        (_get_adapter(BingxAdapter), 'BTC-USDT'),
     ]
     
-    results = {}
+    # Все биржи тестируются одновременно
+    results_list = await asyncio.gather(
+        *(test_exchange(exchange, test_symbol) for exchange, test_symbol in exchanges)
+    )
     
-    for exchange, test_symbol in exchanges:
-        try:
-            success = test_exchange(exchange, test_symbol)
-            results[exchange.name] = success
-        except Exception as e:
-            logger.error(f"Критическая ошибка при тестировании {exchange.name}: {e}")
-            results[exchange.name] = False
+    # Отчеты выводятся целиком и в порядке списка бирж
+    results = {}
+    for (exchange, _), (success, report) in zip(exchanges, results_list):
+        _print_report(report)
+        results[exchange.name] = success
     
     # Итоговая статистика
     print("\n" + "="*80)
@@ -148,14 +253,19 @@ def test_all_exchanges():
     print("="*80 + "\n")
 
 
-def quick_test():
+async def quick_test():
     """Быстрый тест двух основных бирж."""
     print("\n" + "="*80)
     print(" БЫСТРЫЙ ТЕСТ (Binance и Bybit)")
     print("="*80)
     
-    test_exchange(BinanceAdapter(), 'BTCUSDT')
-    test_exchange(BybitAdapter(), 'BTCUSDT')
+    # Обе биржи опрашиваются одновременно
+    results_list = await asyncio.gather(
+        test_exchange(_get_adapter(BinanceAdapter), 'BTCUSDT'),
+        test_exchange(_get_adapter(BybitAdapter), 'BTCUSDT'),
+    )
+    for _, report in results_list:
+        _print_report(report)
     
     print("\n" + "="*80)
     print(" БЫСТРЫЙ ТЕСТ ЗАВЕРШЕН")
@@ -163,12 +273,10 @@ def quick_test():
 
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1 and sys.argv[1] == '--quick':
-        quick_test()
+        asyncio.run(_run(quick_test))
     else:
-        test_all_exchanges()
+        asyncio.run(_run(test_all_exchanges))
         
     print("\nИспользование:")
     print(f"  python {sys.argv[0]}          - Полный тест всех бирж")
@@ -1,6 +1,10 @@
 """Тест только для MEXC - диагностика проблем."""
 import asyncio
+import heapq
 import logging
+import traceback
+from contextlib import contextmanager
+from operator import attrgetter
 
 from exchanges.mexc_adapter import MexcAdapter
 
@@ -11,15 +15,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def test_mexc_contracts():
+@contextmanager
+def _report_errors():
+    """Печатает ошибку теста с трассировкой и не дает ей прервать диагностику."""
+    try:
+        yield
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        traceback.print_exc()
+
+
+async def test_mexc_contracts(mexc: MexcAdapter):
     """Тест получения контрактов."""
     print("\n" + "="*80)
     print("ТЕСТ 1: Получение контрактов от MEXC")
     print("="*80 + "\n")
     
-    mexc = MexcAdapter()
-    
-    try:
+    contracts = []
+    with _report_errors():
         contracts = await mexc.get_top_contracts(limit=10)
         print(f"✅ Получено контрактов: {len(contracts)}\n")
         
@@ -29,27 +42,18 @@ async def test_mexc_contracts():
                 print(f"  {i}. {contract.symbol} ({contract.base_currency})")
         else:
             print("⚠️  Контракты не найдены")
-            
-        await mexc.close()
-        return contracts
-        
-    except Exception as e:
-        print(f"❌ Ошибка: {e}")
-        import traceback
-        traceback.print_exc()
-        await mexc.close()
-        return []
+    
+    return contracts
 
 
-async def test_mexc_funding_rate(symbol='BTC_USDT'):
+async def test_mexc_funding_rate(mexc: MexcAdapter, symbol='BTC_USDT'):
     """Тест получения funding rate для конкретного символа."""
     print("\n" + "="*80)
     print(f"ТЕСТ 2: Получение funding rate для {symbol}")
     print("="*80 + "\n")
     
-    mexc = MexcAdapter()
-    
-    try:
+    rate = None
+    with _report_errors():
         rate = await mexc.get_funding_rate(symbol)
         
         if rate:
@@ -70,51 +74,34 @@ async def test_mexc_funding_rate(symbol='BTC_USDT'):
                     print(f"  ✅ Успех с {alt_symbol}!")
                     rate = alt_rate
                     break
-                    
-        await mexc.close()
-        return rate
-        
-    except Exception as e:
-        print(f"❌ Ошибка: {e}")
-        import traceback
-        traceback.print_exc()
-        await mexc.close()
-        return None
+    
+    return rate
 
 
-async def test_mexc_all_rates():
+async def test_mexc_all_rates(mexc: MexcAdapter):
     """Тест получения всех funding rates."""
     print("\n" + "="*80)
     print("ТЕСТ 3: Получение всех funding rates")
     print("="*80 + "\n")
     
-    mexc = MexcAdapter()
-    
-    try:
+    rates = []
+    with _report_errors():
         print("🔄 Получаю данные (может занять ~10-15 сек)...\n")
         rates = await mexc.get_all_funding_rates()
         
         print(f"✅ Получено ставок: {len(rates)}\n")
         
         if rates:
-            # Сортируем по абсолютной ставке
-            rates.sort(key=lambda x: x.abs_rate, reverse=True)
+            # Нужны только 5 лучших по абсолютной ставке - без полной сортировки
+            top_rates = heapq.nlargest(5, rates, key=attrgetter('abs_rate'))
             
             print("Топ-5 по абсолютной ставке:")
-            for i, rate in enumerate(rates[:5], 1):
+            for i, rate in enumerate(top_rates, 1):
                 print(f"  {i}. {rate.symbol}: {rate.rate_percentage:+.4f}% (${rate.price:.2f})")
         else:
             print("⚠️  Не получено ни одной ставки")
-            
-        await mexc.close()
-        return rates
-        
-    except Exception as e:
-        print(f"❌ Ошибка: {e}")
-        import traceback
-        traceback.print_exc()
-        await mexc.close()
-        return []
+    
+    return rates
 
 
 async def test_mexc_api_direct():
@@ -123,25 +110,36 @@ async def test_mexc_api_direct():
     print("ТЕСТ 4: Прямой запрос к MEXC API")
     print("="*80 + "\n")
     
-    import httpx
+    import aiohttp
     
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
+    with _report_errors():
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            # aiohttp не умеет HTTP/2: параллельные запросы к одному хосту идут по отдельным соединениям
+            connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300)
+        ) as session:
+            async def fetch(url):
+                async with session.get(url) as resp:
+                    return resp.status, await resp.json(content_type=None)
+            
+            url1 = "https://contract.mexc.com/api/v1/contract/detail"
+            url2 = "https://contract.mexc.com/api/v1/contract/ticker/BTC_USDT"
+            url3 = "https://contract.mexc.com/api/v1/contract/funding_rate/BTC_USDT"
+            
+            # Запросы независимы - отправляем одновременно, выводим по порядку
+            (status1, data1), (status2, data2), (status3, data3) = await asyncio.gather(
+                fetch(url1), fetch(url2), fetch(url3)
+            )
+            
             # Тест 1: Contract detail
             print("1. Проверка /api/v1/contract/detail...")
-            url1 = "https://contract.mexc.com/api/v1/contract/detail"
-            resp1 = await client.get(url1)
-            data1 = resp1.json()
-            print(f"   Status: {resp1.status_code}")
+            print(f"   Status: {status1}")
             print(f"   Success: {data1.get('success')}")
             print(f"   Data items: {len(data1.get('data', []))}")
             
             # Тест 2: Ticker для BTC_USDT
             print("\n2. Проверка /api/v1/contract/ticker/BTC_USDT...")
-            url2 = "https://contract.mexc.com/api/v1/contract/ticker/BTC_USDT"
-            resp2 = await client.get(url2)
-            data2 = resp2.json()
-            print(f"   Status: {resp2.status_code}")
+            print(f"   Status: {status2}")
             print(f"   Success: {data2.get('success')}")
             if data2.get('success'):
                 ticker_data = data2.get('data', {})
@@ -150,18 +148,10 @@ async def test_mexc_api_direct():
             
             # Тест 3: Funding rate
             print("\n3. Проверка /api/v1/contract/funding_rate/BTC_USDT...")
-            url3 = "https://contract.mexc.com/api/v1/contract/funding_rate/BTC_USDT"
-            resp3 = await client.get(url3)
-            data3 = resp3.json()
-            print(f"   Status: {resp3.status_code}")
+            print(f"   Status: {status3}")
             print(f"   Success: {data3.get('success')}")
             if data3.get('success'):
                 print(f"   Funding rate: {data3.get('data', {}).get('fundingRate')}")
-                
-    except Exception as e:
-        print(f"❌ Ошибка: {e}")
-        import traceback
-        traceback.print_exc()
 
 
 async def main():
@@ -173,19 +163,22 @@ async def main():
     # Тест прямых запросов к API
     await test_mexc_api_direct()
     
-    # Тест контрактов
-    contracts = await test_mexc_contracts()
-    
-    # Тест funding rate
-    if contracts:
-        # Берем первый контракт для теста
-        test_symbol = contracts[0].symbol
-        await test_mexc_funding_rate(test_symbol)
-    else:
-        await test_mexc_funding_rate('BTC_USDT')
-    
-    # Тест всех rates
-    await test_mexc_all_rates()
+    # Один адаптер на все тесты: соединение с contract.mexc.com переиспользуется,
+    # клиент закрывается при выходе из контекста
+    async with MexcAdapter() as mexc:
+        # Тест контрактов
+        contracts = await test_mexc_contracts(mexc)
+        
+        # Тест funding rate
+        if contracts:
+            # Берем первый контракт для теста
+            test_symbol = contracts[0].symbol
+            await test_mexc_funding_rate(mexc, test_symbol)
+        else:
+            await test_mexc_funding_rate(mexc, 'BTC_USDT')
+        
+        # Тест всех rates
+        await test_mexc_all_rates(mexc)
     
     print("\n" + "="*80)
     print(" ДИАГНОСТИКА ЗАВЕРШЕНА")